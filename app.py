@@ -2,13 +2,17 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 import pandas as pd
+import numpy as np
 from datetime import datetime
 
 # Load environment variables
 load_dotenv()
 
 from utils.tastytrade_api import TastytradeAPI
+from utils.tradier_api import TradierAPI
+from utils.market_hours import get_market_status
 from utils.csp_ladder_manager import render_csp_ladder_manager
+from utils.covered_calls import select_best_per_ticker
 
 # Page config
 st.set_page_config(
@@ -24,6 +28,49 @@ if 'api' not in st.session_state:
 
 api = st.session_state.api
 
+# Tradier client (option chains with greeks) - stateless, so one instance is shared across reruns
+@st.cache_resource
+def _get_tradier():
+    return TradierAPI()
+
+# Market status banner only needs minute-level freshness, so skip recomputing it on every rerun
+@st.cache_data(ttl=30)
+def _market_status():
+    return get_market_status()
+
+# CC preset filter defaults (used for first-time init and the Reset buttons)
+_CC_DEFAULTS = {
+    'conservative': {
+        'cc_conservative_delta_min': 0.10,
+        'cc_conservative_delta_max': 0.20,
+        'cc_conservative_dte_min': 7,
+        'cc_conservative_dte_max': 30,
+        'cc_conservative_oi_min': 50,
+        'cc_conservative_weekly_min': 0.3,
+    },
+    'medium': {
+        'cc_medium_delta_min': 0.15,
+        'cc_medium_delta_max': 0.30,
+        'cc_medium_dte_min': 7,
+        'cc_medium_dte_max': 30,
+        'cc_medium_oi_min': 50,
+        'cc_medium_weekly_min': 0.3,
+    },
+    'aggressive': {
+        'cc_aggressive_delta_min': 0.20,
+        'cc_aggressive_delta_max': 0.40,
+        'cc_aggressive_dte_min': 7,
+        'cc_aggressive_dte_max': 21,
+        'cc_aggressive_oi_min': 25,
+        'cc_aggressive_weekly_min': 0.3,
+    },
+}
+
+def _reset_cc_preset(preset):
+    # Button callback: runs before the rerun the click already triggers, so no explicit st.rerun()
+    st.session_state.update(_CC_DEFAULTS[preset])
+    st.toast(f"✅ {preset.capitalize()} reset to defaults!")
+
 # Initialize accounts at the top so they are available for the sidebar
 if 'accounts' not in st.session_state:
     try:
@@ -445,8 +492,7 @@ with st.sidebar:
         """, unsafe_allow_html=True)
     
     # Market Status
-    from utils.market_hours import get_market_status
-    market_status = get_market_status()
+    market_status = _market_status()
     status_text = "Market Open" if market_status['is_open'] else "Market Closed"
     status_color = "#10b981" if market_status['is_open'] else "#ef4444"
     
@@ -623,11 +669,13 @@ if page == "Home":
 elif page == "CSP Dashboard":
     st.title("💰 Cash-Secured Puts Dashboard")
     
-    from utils.tradier_api import TradierAPI
+    # One timestamp per rerun, shared by all download filenames below
+    export_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
     from utils.yahoo_finance import get_technical_indicators
     from utils.cash_secured_puts import get_existing_csp_positions
     
-    tradier = TradierAPI()
+    tradier = _get_tradier()
     
     # Display existing CSP positions
     st.subheader("📊 Existing CSP Positions")
@@ -1993,7 +2041,7 @@ elif page == "CSP Dashboard":
                         st.download_button(
                             label="📄 Download DOCX",
                             data=docx_data,
-                            file_name=f"AI_Analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx",
+                            file_name=f"AI_Analysis_{export_timestamp}.docx",
                             mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                             use_container_width=True
                         )
@@ -2008,7 +2056,7 @@ elif page == "CSP Dashboard":
                         st.download_button(
                             label="📕 Download PDF",
                             data=pdf_data,
-                            file_name=f"AI_Analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                            file_name=f"AI_Analysis_{export_timestamp}.pdf",
                             mime="application/pdf",
                             use_container_width=True
                         )
@@ -2328,7 +2376,7 @@ elif page == "CSP Dashboard":
             st.download_button(
                 label="📥 Download Opportunities CSV",
                 data=csv,
-                file_name=f"csp_opportunities_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                file_name=f"csp_opportunities_{export_timestamp}.csv",
                 mime="text/csv",
                 use_container_width=True
             )
@@ -2338,7 +2386,7 @@ elif page == "CSP Dashboard":
                 st.download_button(
                     label="📄 Download Scan Log",
                     data=st.session_state.csp_scan_log,
-                    file_name=f"csp_scan_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                    file_name=f"csp_scan_log_{export_timestamp}.txt",
                     mime="text/plain",
                     use_container_width=True
                 )
@@ -2356,7 +2404,7 @@ elif page == "CSP Dashboard":
             st.download_button(
                 label="📄 Download Scan Log for Analysis",
                 data=st.session_state.csp_scan_log,
-                file_name=f"csp_scan_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                file_name=f"csp_scan_log_{export_timestamp}.txt",
                 mime="text/plain",
                 use_container_width=True
             )
@@ -2366,8 +2414,7 @@ elif page == "CSP Dashboard":
 
 elif page == "CC Dashboard":
     # Market Status Indicator
-    from utils.market_hours import get_market_status
-    market_status = get_market_status()
+    market_status = _market_status()
     
     # Premium Header
     st.markdown('<h1 style="color: #ffffff; font-size: 36px; font-weight: 600; margin-bottom: 0.5rem;">📞 Covered Calls</h1>', unsafe_allow_html=True)
@@ -2387,8 +2434,7 @@ elif page == "CC Dashboard":
         st.caption(f"Current time: {market_status['current_time_et']}")
     
     # Initialize Tradier API for option chains with greeks
-    from utils.tradier_api import TradierAPI
-    tradier = TradierAPI()
+    tradier = _get_tradier()
     
     # Use the account selected in the sidebar
     if not selected_account:
@@ -2404,17 +2450,32 @@ elif page == "CC Dashboard":
         # Account changed - clear all CC data
         st.session_state.cc_current_account = selected_account
         st.session_state.cc_eligible_holdings = None
+        st.session_state.cc_max_contracts_arr = np.zeros(0, dtype=np.int32)
         st.session_state.cc_breakdown = None
         st.session_state.cc_selected_stocks = []
+        st.session_state.cc_selected_stocks_set = set()
+        if 'cc_sel_ms' in st.session_state:
+            del st.session_state.cc_sel_ms
         if 'cc_opportunities' in st.session_state:
             del st.session_state.cc_opportunities
+            del st.session_state.cc_select_arr
+            del st.session_state.cc_qty_arr
+            del st.session_state.cc_symbol_codes
+            del st.session_state.cc_symbols
         st.info("🔄 Account changed - data cleared. Please fetch positions and scan again.")
     
     # Initialize session state for selected stocks
     if 'cc_selected_stocks' not in st.session_state:
         st.session_state.cc_selected_stocks = []
+    if 'cc_selected_stocks_set' not in st.session_state:
+        st.session_state.cc_selected_stocks_set = set(st.session_state.cc_selected_stocks)
     if 'cc_eligible_holdings' not in st.session_state:
         st.session_state.cc_eligible_holdings = []
+    if 'cc_max_contracts_arr' not in st.session_state:
+        holdings_list = st.session_state.cc_eligible_holdings or []
+        st.session_state.cc_max_contracts_arr = np.fromiter(
+            (h.get('max_contracts', 0) for h in holdings_list), dtype=np.int32, count=len(holdings_list)
+        )
     if 'cc_breakdown' not in st.session_state:
         st.session_state.cc_breakdown = {}
     
@@ -2429,7 +2490,7 @@ elif page == "CC Dashboard":
     st.write("")
     if st.button("🔍 Fetch Portfolio Positions", type="primary", use_container_width=True):
         try:
-            from utils.covered_calls import get_eligible_stock_positions
+            from utils.covered_calls import get_eligible_stock_positions_cached
             
             with st.status("Fetching positions...", expanded=True) as status:
                 st.write("📊 Fetching all positions...")
@@ -2437,10 +2498,17 @@ elif page == "CC Dashboard":
                 # Use the global API instance from sidebar
                 # api is already initialized at the top of the file
                 
-                holdings, breakdown = get_eligible_stock_positions(api, selected_account)
+                holdings, breakdown = get_eligible_stock_positions_cached(api, selected_account)
+                if not breakdown.get('total_positions'):
+                    # A failed fetch or expired session also comes back as "no positions" -
+                    # drop that entry so the next click retries instead of reusing it
+                    get_eligible_stock_positions_cached.clear(api, selected_account)
                 
                 # Store in session state
                 st.session_state.cc_eligible_holdings = holdings
+                st.session_state.cc_max_contracts_arr = np.fromiter(
+                    (h.get('max_contracts', 0) for h in holdings), dtype=np.int32, count=len(holdings)
+                )
                 st.session_state.cc_breakdown = breakdown
                 
                 status.update(label="✅ Positions fetched!", state="complete")
@@ -2463,7 +2531,7 @@ elif page == "CC Dashboard":
         st.markdown('<div class="section-header">📊 Position Summary</div>', unsafe_allow_html=True)
         
         # Calculate total eligible contracts (shares / 100)
-        total_eligible_contracts = sum([h.get('max_contracts', 0) for h in holdings])
+        total_eligible_contracts = int(st.session_state.cc_max_contracts_arr.sum())
         
         col1, col2, col3, col4, col5 = st.columns(5)
         with col1:
@@ -2522,52 +2590,50 @@ elif page == "CC Dashboard":
                 st.info("📊 All your stock positions already have covered calls sold against them. No additional contracts available.")
                 st.stop()
             
-            # Create dataframe
-            import pandas as pd
-            eligible_df = pd.DataFrame(available_holdings)
+            # Create display dataframe (formatted once per holdings list, cached)
+            from utils.covered_calls import build_eligible_positions_table
+            eligible_display = build_eligible_positions_table(available_holdings)
             
-            # Add selection column
-            eligible_df['Select'] = eligible_df['symbol'].isin(st.session_state.cc_selected_stocks)
+            symbol_options = eligible_display['Symbol'].tolist()
             
-            # Reorder columns
-            display_cols = ['Select', 'symbol', 'quantity', 'current_price', 'market_value', 'max_contracts']
-            eligible_display = eligible_df[display_cols].copy()
-            eligible_display.columns = ['Select', 'Symbol', 'Shares', 'Price', 'Market Value', 'Max Contracts']
-            
-            # Format numbers
-            eligible_display['Price'] = eligible_display['Price'].apply(lambda x: f"${x:.2f}")
-            eligible_display['Market Value'] = eligible_display['Market Value'].apply(lambda x: f"${x:,.2f}")
+            # Seed the multiselect from the stored selection, dropping symbols no longer eligible
+            # (must happen before the widget is created in this run)
+            if 'cc_sel_ms' not in st.session_state:
+                st.session_state.cc_sel_ms = list(st.session_state.cc_selected_stocks)
+            options_set = set(symbol_options)
+            st.session_state.cc_sel_ms = [s for s in st.session_state.cc_sel_ms if s in options_set]
             
             # Selection buttons
             col1, col2, col3 = st.columns([1, 1, 4])
             with col1:
                 if st.button("🔘 Select All"):
-                    st.session_state.cc_selected_stocks = eligible_df['symbol'].tolist()
-                    st.rerun()
+                    st.session_state.cc_sel_ms = symbol_options
             with col2:
                 if st.button("⭕ Clear All"):
-                    st.session_state.cc_selected_stocks = []
-                    st.rerun()
+                    st.session_state.cc_sel_ms = []
             
-            # Display table with checkboxes
-            edited_df = st.data_editor(
+            # Display read-only table; selection is made with the multiselect below
+            st.dataframe(
                 eligible_display,
                 use_container_width=True,
                 hide_index=True,
-                disabled=['Symbol', 'Shares', 'Price', 'Market Value', 'Max Contracts'],
                 column_config={
-                    "Select": st.column_config.CheckboxColumn(
-                        "Select",
-                        help="Select stocks to scan for covered calls",
-                        default=False,
-                    )
-                },
-                key="cc_eligible_table"
+                    "Price": st.column_config.NumberColumn("Price", format="$%.2f"),
+                    "Market Value": st.column_config.NumberColumn("Market Value", format="dollar")
+                }
+            )
+            
+            selected_symbols = st.multiselect(
+                "Select stocks to scan",
+                options=symbol_options,
+                help="Select stocks to scan for covered calls",
+                key="cc_sel_ms"
             )
             
-            # Update selected stocks based on checkboxes
-            selected_symbols = eligible_df[edited_df['Select']]['symbol'].tolist()
-            st.session_state.cc_selected_stocks = selected_symbols
+            # Update selected stocks (skipped when the selection is unchanged)
+            if selected_symbols != st.session_state.cc_selected_stocks:
+                st.session_state.cc_selected_stocks = selected_symbols
+                st.session_state.cc_selected_stocks_set = set(selected_symbols)
             
             st.write(f"**Selected:** {len(selected_symbols)} stocks")
             if selected_symbols:
@@ -2592,7 +2658,8 @@ elif page == "CC Dashboard":
                         
                         with st.status(f"Scanning {len(selected_symbols)} stocks...", expanded=True) as status:
                             # Filter holdings to only selected stocks
-                            selected_holdings = [h for h in holdings if h['symbol'] in selected_symbols]
+                            selected_set = st.session_state.cc_selected_stocks_set
+                            selected_holdings = [h for h in holdings if h['symbol'] in selected_set]
                             
                             st.write(f"🔍 Pre-scanning option chains for {len(selected_holdings)} stocks...")
                             st.write(f"Pre-scan range: Delta {min_prescan_delta}-{max_prescan_delta}, DTE {prescan_min_dte}-{prescan_max_dte}")
@@ -2619,10 +2686,21 @@ elif page == "CC Dashboard":
                             
                             # Store in session state as DataFrame (like CSP Dashboard)
                             df = pd.DataFrame(all_opportunities)
-                            df.insert(0, 'Select', False)  # Add Select column
-                            df.insert(1, 'Qty', 1)  # Add Qty column with default value of 1
-                            df = df.sort_values('weekly_return_pct', ascending=False)
+                            # Narrow integer columns once here so preset masks run over compact arrays
+                            # (float columns stay float64 so delta/weekly thresholds compare exactly)
+                            df = df.astype({'dte': 'int32', 'open_interest': 'int32', 'volume': 'int32', 'max_contracts': 'int32'})
+                            # Arrow-backed strings pass straight through to the data_editor's Arrow transport
+                            df = df.astype({'symbol': 'string[pyarrow]', 'expiration': 'string[pyarrow]'})
+                            df = df.sort_values('weekly_return_pct', ascending=False).reset_index(drop=True)
                             st.session_state.cc_opportunities = df
+                            # Select/Qty live in standalone arrays (row-aligned with the static frame above)
+                            # so the preset and quantity buttons are plain NumPy writes
+                            st.session_state.cc_select_arr = np.zeros(len(df), dtype=bool)
+                            st.session_state.cc_qty_arr = np.ones(len(df), dtype=np.int32)
+                            # Integer symbol codes so per-symbol totals are np.bincount over the arrays
+                            symbol_codes, symbols = pd.factorize(df['symbol'])
+                            st.session_state.cc_symbol_codes = symbol_codes.astype(np.int32)
+                            st.session_state.cc_symbols = np.asarray(symbols, dtype=object)
                             st.rerun()
                         
                     except Exception as e:
@@ -2631,118 +2709,23 @@ elif page == "CC Dashboard":
                         st.error(traceback.format_exc())
         
         # Display opportunities if we have them
-        if 'cc_opportunities' in st.session_state and len(st.session_state.cc_opportunities) > 0:
+        # Rendered as a fragment so preset/quantity/table interactions only rerun this panel,
+        # not the market status, position summary and eligible positions table above
+        @st.fragment
+        def _render_cc_opportunities_panel():
             st.write("")
             st.write("---")
             st.write("### 🎯 Covered Call Opportunities")
             
-            # Helper function: Find best opportunity per ticker with criteria relaxation
-            def select_best_per_ticker(df, delta_min, delta_max, dte_min, dte_max, oi_min, weekly_min, qty_mode='conservative'):
-                """
-                For each ticker, find the BEST opportunity (highest weekly return) that matches criteria.
-                If no match, relax criteria to find closest match.
-                
-                Args:
-                    df: DataFrame of all opportunities
-                    delta_min, delta_max, dte_min, dte_max, oi_min, weekly_min: Filter criteria
-                    qty_mode: 'conservative' (1), 'medium' (50%), 'aggressive' (100%)
-                
-                Returns:
-                    List of (index, qty) tuples to select
-                """
-                import math
-                selections = []
-                
-                # Group by ticker
-                for symbol in df['symbol'].unique():
-                    ticker_opps = df[df['symbol'] == symbol]
-                    
-                    # Try to find match with original criteria
-                    mask = (
-                        (ticker_opps['delta'] >= delta_min) &
-                        (ticker_opps['delta'] <= delta_max) &
-                        (ticker_opps['dte'] >= dte_min) &
-                        (ticker_opps['dte'] <= dte_max) &
-                        (ticker_opps['open_interest'] >= oi_min) &
-                        (ticker_opps['weekly_return_pct'] >= weekly_min)
-                    )
-                    matches = ticker_opps[mask]
-                    
-                    # If no match, relax ONLY weekly return and OI (NEVER relax delta or DTE)
-                    if len(matches) == 0:
-                        # Relax weekly return (keep delta and DTE as hard limits)
-                        mask = (
-                            (ticker_opps['delta'] >= delta_min) &
-                            (ticker_opps['delta'] <= delta_max) &
-                            (ticker_opps['dte'] >= dte_min) &
-                            (ticker_opps['dte'] <= dte_max) &
-                            (ticker_opps['open_interest'] >= oi_min)
-                        )
-                        matches = ticker_opps[mask]
-                    
-                    if len(matches) == 0:
-                        # Relax open interest (keep delta and DTE as hard limits)
-                        mask = (
-                            (ticker_opps['delta'] >= delta_min) &
-                            (ticker_opps['delta'] <= delta_max) &
-                            (ticker_opps['dte'] >= dte_min) &
-                            (ticker_opps['dte'] <= dte_max)
-                        )
-                        matches = ticker_opps[mask]
-                    
-                    # If still no match, skip this ticker (Delta and DTE are HARD LIMITS)
-                    if len(matches) == 0:
-                        continue  # Skip this ticker - no contracts within delta/DTE range
-                    
-                    # Find the best match: closest to target delta, then highest weekly return
-                    # Target delta is the middle of the range
-                    target_delta = (delta_min + delta_max) / 2
-                    matches['delta_distance'] = abs(matches['delta'] - target_delta)
-                    
-                    # Sort by: 1) closest to target delta, 2) highest weekly return
-                    matches = matches.sort_values(['delta_distance', 'weekly_return_pct'], ascending=[True, False])
-                    best_idx = matches.index[0]
-                    best_opp = matches.loc[best_idx]
-                    
-                    # Calculate quantity based on mode
-                    if qty_mode == 'conservative':
-                        qty = 1
-                    elif qty_mode == 'medium':
-                        qty = max(1, math.ceil(best_opp['max_contracts'] * 0.5))
-                    else:  # aggressive
-                        qty = best_opp['max_contracts']
-                    
-                    selections.append((best_idx, qty))
-                
-                return selections
-            
             # Initialize preset criteria in session state (defaults)
-            if 'cc_conservative_delta_min' not in st.session_state:
-                st.session_state.cc_conservative_delta_min = 0.10
-                st.session_state.cc_conservative_delta_max = 0.20
-                st.session_state.cc_conservative_dte_min = 7
-                st.session_state.cc_conservative_dte_max = 30
-                st.session_state.cc_conservative_oi_min = 50
-                st.session_state.cc_conservative_weekly_min = 0.3
-            
-            if 'cc_medium_delta_min' not in st.session_state:
-                st.session_state.cc_medium_delta_min = 0.15
-                st.session_state.cc_medium_delta_max = 0.30
-                st.session_state.cc_medium_dte_min = 7
-                st.session_state.cc_medium_dte_max = 30
-                st.session_state.cc_medium_oi_min = 50
-                st.session_state.cc_medium_weekly_min = 0.3
+            for preset, defaults in _CC_DEFAULTS.items():
+                if f'cc_{preset}_delta_min' not in st.session_state:
+                    st.session_state.update(defaults)
             
-            if 'cc_aggressive_delta_min' not in st.session_state:
-                st.session_state.cc_aggressive_delta_min = 0.20
-                st.session_state.cc_aggressive_delta_max = 0.40
-                st.session_state.cc_aggressive_dte_min = 7
-                st.session_state.cc_aggressive_dte_max = 21
-                st.session_state.cc_aggressive_oi_min = 25
-                st.session_state.cc_aggressive_weekly_min = 0.3
-            
-            # Get DataFrame from session state (already has Select column)
-            opp_df = st.session_state.cc_opportunities
+            # Static opportunities frame plus the mutable Select/Qty arrays (positionally aligned)
+            static_df = st.session_state.cc_opportunities
+            select_arr = st.session_state.cc_select_arr
+            qty_arr = st.session_state.cc_qty_arr
             
             # Preset Filter Buttons
             st.write("")
@@ -2750,8 +2733,7 @@ elif page == "CC Dashboard":
             
             with col1:
                 if st.button("🗑️ Clear All", use_container_width=True, key="cc_clear_all"):
-                    st.session_state.cc_opportunities['Select'] = False
-                    st.rerun()
+                    select_arr[:] = False
             
             with col2:
                 if st.button("🟢 Conservative", use_container_width=True, key="cc_preset_conservative", 
@@ -2760,12 +2742,12 @@ elif page == "CC Dashboard":
                     st.session_state.cc_active_preset = 'conservative'
                     
                     # Clear all first
-                    st.session_state.cc_opportunities['Select'] = False
-                    st.session_state.cc_opportunities['Qty'] = 1  # Reset all to 1
+                    select_arr[:] = False
+                    qty_arr[:] = 1  # Reset all to 1
                     
                     # Use smart per-ticker selection
                     selections = select_best_per_ticker(
-                        st.session_state.cc_opportunities,
+                        static_df,
                         st.session_state.cc_conservative_delta_min,
                         st.session_state.cc_conservative_delta_max,
                         st.session_state.cc_conservative_dte_min,
@@ -2775,12 +2757,9 @@ elif page == "CC Dashboard":
                         qty_mode='conservative'
                     )
                     
-                    # Apply selections
-                    for idx, qty in selections:
-                        st.session_state.cc_opportunities.loc[idx, 'Select'] = True
-                        st.session_state.cc_opportunities.loc[idx, 'Qty'] = qty
-                    
-                    st.rerun()
+                    # Apply selections (one vectorized write per column)
+                    select_arr[selections.index] = True
+                    qty_arr[selections.index] = selections.to_numpy()
             
             with col3:
                 if st.button("🟡 Medium", use_container_width=True, key="cc_preset_medium",
@@ -2789,12 +2768,12 @@ elif page == "CC Dashboard":
                     st.session_state.cc_active_preset = 'medium'
                     
                     # Clear all first
-                    st.session_state.cc_opportunities['Select'] = False
-                    st.session_state.cc_opportunities['Qty'] = 1  # Reset all to 1
+                    select_arr[:] = False
+                    qty_arr[:] = 1  # Reset all to 1
                     
                     # Use smart per-ticker selection
                     selections = select_best_per_ticker(
-                        st.session_state.cc_opportunities,
+                        static_df,
                         st.session_state.cc_medium_delta_min,
                         st.session_state.cc_medium_delta_max,
                         st.session_state.cc_medium_dte_min,
@@ -2804,12 +2783,9 @@ elif page == "CC Dashboard":
                         qty_mode='medium'
                     )
                     
-                    # Apply selections
-                    for idx, qty in selections:
-                        st.session_state.cc_opportunities.loc[idx, 'Select'] = True
-                        st.session_state.cc_opportunities.loc[idx, 'Qty'] = qty
-                    
-                    st.rerun()
+                    # Apply selections (one vectorized write per column)
+                    select_arr[selections.index] = True
+                    qty_arr[selections.index] = selections.to_numpy()
             
             with col4:
                 if st.button("🔴 Aggressive", use_container_width=True, key="cc_preset_aggressive",
@@ -2818,12 +2794,12 @@ elif page == "CC Dashboard":
                     st.session_state.cc_active_preset = 'aggressive'
                     
                     # Clear all first
-                    st.session_state.cc_opportunities['Select'] = False
-                    st.session_state.cc_opportunities['Qty'] = 1  # Reset all to 1
+                    select_arr[:] = False
+                    qty_arr[:] = 1  # Reset all to 1
                     
                     # Use smart per-ticker selection
                     selections = select_best_per_ticker(
-                        st.session_state.cc_opportunities,
+                        static_df,
                         st.session_state.cc_aggressive_delta_min,
                         st.session_state.cc_aggressive_delta_max,
                         st.session_state.cc_aggressive_dte_min,
@@ -2833,20 +2809,16 @@ elif page == "CC Dashboard":
                         qty_mode='aggressive'
                     )
                     
-                    # Apply selections
-                    for idx, qty in selections:
-                        st.session_state.cc_opportunities.loc[idx, 'Select'] = True
-                        st.session_state.cc_opportunities.loc[idx, 'Qty'] = qty
-                    
-                    st.rerun()
+                    # Apply selections (one vectorized write per column)
+                    select_arr[selections.index] = True
+                    qty_arr[selections.index] = selections.to_numpy()
             
             with col5:
                 if st.button("✅ Select All", use_container_width=True, key="cc_select_all"):
-                    st.session_state.cc_opportunities['Select'] = True
-                    st.rerun()
+                    select_arr[:] = True
             
             with col6:
-                selected_count = opp_df['Select'].sum()
+                selected_count = int(select_arr.sum())
                 st.metric("Selected", int(selected_count))
             
             st.write("")
@@ -2857,47 +2829,33 @@ elif page == "CC Dashboard":
             
             with col1:
                 if st.button("➥ +1", use_container_width=True, key="cc_qty_plus1", help="Add 1 to selected quantities"):
-                    mask = st.session_state.cc_opportunities['Select'] == True
-                    st.session_state.cc_opportunities.loc[mask, 'Qty'] = st.session_state.cc_opportunities.loc[mask, 'Qty'] + 1
-                    st.rerun()
+                    qty_arr[select_arr] += 1
             
             with col2:
                 if st.button("➥ +5", use_container_width=True, key="cc_qty_plus5", help="Add 5 to selected quantities"):
-                    mask = st.session_state.cc_opportunities['Select'] == True
-                    st.session_state.cc_opportunities.loc[mask, 'Qty'] = st.session_state.cc_opportunities.loc[mask, 'Qty'] + 5
-                    st.rerun()
+                    qty_arr[select_arr] += 5
             
             with col3:
                 if st.button("➥ +10", use_container_width=True, key="cc_qty_plus10", help="Add 10 to selected quantities"):
-                    mask = st.session_state.cc_opportunities['Select'] == True
-                    st.session_state.cc_opportunities.loc[mask, 'Qty'] = st.session_state.cc_opportunities.loc[mask, 'Qty'] + 10
-                    st.rerun()
+                    qty_arr[select_arr] += 10
             
             with col4:
                 if st.button("➖ -1", use_container_width=True, key="cc_qty_minus1", help="Subtract 1 from selected quantities (min 1)"):
-                    mask = st.session_state.cc_opportunities['Select'] == True
-                    st.session_state.cc_opportunities.loc[mask, 'Qty'] = st.session_state.cc_opportunities.loc[mask, 'Qty'].apply(lambda x: max(1, x - 1))
-                    st.rerun()
+                    qty_arr[select_arr] = np.maximum(qty_arr[select_arr] - 1, 1)
             
             with col5:
                 if st.button("🔺 Max Out", use_container_width=True, key="cc_qty_max", help="Set selected quantities to maximum available contracts"):
-                    mask = st.session_state.cc_opportunities['Select'] == True
                     # Set Qty to max_contracts for selected rows
-                    for idx in st.session_state.cc_opportunities[mask].index:
-                        max_contracts = st.session_state.cc_opportunities.loc[idx, 'max_contracts']
-                        st.session_state.cc_opportunities.loc[idx, 'Qty'] = max_contracts
-                    st.rerun()
+                    qty_arr[select_arr] = static_df['max_contracts'].to_numpy()[select_arr]
             
             with col6:
                 if st.button("🔄 Reset", use_container_width=True, key="cc_qty_reset", help="Reset selected quantities to 1"):
-                    mask = st.session_state.cc_opportunities['Select'] == True
-                    st.session_state.cc_opportunities.loc[mask, 'Qty'] = 1
-                    st.rerun()
+                    qty_arr[select_arr] = 1
             
             with col7:
                 # Show total contracts for selected
                 if selected_count > 0:
-                    selected_qty_sum = st.session_state.cc_opportunities[st.session_state.cc_opportunities['Select'] == True]['Qty'].sum()
+                    selected_qty_sum = qty_arr[select_arr].sum()
                     st.info(f"📊 Selected: {int(selected_qty_sum)} contracts ({int(selected_count)} options)")
             
             st.write("")
@@ -2908,19 +2866,19 @@ elif page == "CC Dashboard":
             
             # Conservative Expander
             with st.expander("🟢 Conservative Filter Configuration", expanded=False):
-                col1, col2 = st.columns(2)
-                with col1:
-                    cons_delta_min = st.number_input("Min Delta", value=st.session_state.cc_conservative_delta_min, min_value=0.0, max_value=1.0, step=0.01, key="cons_delta_min_input")
-                    cons_delta_max = st.number_input("Max Delta", value=st.session_state.cc_conservative_delta_max, min_value=0.0, max_value=1.0, step=0.01, key="cons_delta_max_input")
-                    cons_dte_min = st.number_input("Min DTE", value=st.session_state.cc_conservative_dte_min, min_value=0, max_value=365, step=1, key="cons_dte_min_input")
-                with col2:
-                    cons_dte_max = st.number_input("Max DTE", value=st.session_state.cc_conservative_dte_max, min_value=0, max_value=365, step=1, key="cons_dte_max_input")
-                    cons_oi_min = st.number_input("Min Open Interest", value=st.session_state.cc_conservative_oi_min, min_value=0, step=10, key="cons_oi_min_input")
-                    cons_weekly_min = st.number_input("Min Weekly Return %", value=st.session_state.cc_conservative_weekly_min, min_value=0.0, step=0.1, key="cons_weekly_min_input")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("💾 Commit Conservative", use_container_width=True, key="commit_conservative"):
+                # Inputs are batched in a form so edits only rerun on Commit
+                with st.form("cc_conservative_form"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        cons_delta_min = st.number_input("Min Delta", value=st.session_state.cc_conservative_delta_min, min_value=0.0, max_value=1.0, step=0.01, key="cons_delta_min_input")
+                        cons_delta_max = st.number_input("Max Delta", value=st.session_state.cc_conservative_delta_max, min_value=0.0, max_value=1.0, step=0.01, key="cons_delta_max_input")
+                        cons_dte_min = st.number_input("Min DTE", value=st.session_state.cc_conservative_dte_min, min_value=0, max_value=365, step=1, key="cons_dte_min_input")
+                    with col2:
+                        cons_dte_max = st.number_input("Max DTE", value=st.session_state.cc_conservative_dte_max, min_value=0, max_value=365, step=1, key="cons_dte_max_input")
+                        cons_oi_min = st.number_input("Min Open Interest", value=st.session_state.cc_conservative_oi_min, min_value=0, step=10, key="cons_oi_min_input")
+                        cons_weekly_min = st.number_input("Min Weekly Return %", value=st.session_state.cc_conservative_weekly_min, min_value=0.0, step=0.1, key="cons_weekly_min_input")
+                    
+                    if st.form_submit_button("💾 Commit Conservative", use_container_width=True):
                         st.session_state.cc_conservative_delta_min = cons_delta_min
                         st.session_state.cc_conservative_delta_max = cons_delta_max
                         st.session_state.cc_conservative_dte_min = cons_dte_min
@@ -2928,33 +2886,25 @@ elif page == "CC Dashboard":
                         st.session_state.cc_conservative_oi_min = cons_oi_min
                         st.session_state.cc_conservative_weekly_min = cons_weekly_min
                         st.success("✅ Conservative criteria committed!")
-                        st.rerun()
-                with col2:
-                    if st.button("🔄 Reset Conservative", use_container_width=True, key="reset_conservative"):
-                        st.session_state.cc_conservative_delta_min = 0.10
-                        st.session_state.cc_conservative_delta_max = 0.20
-                        st.session_state.cc_conservative_dte_min = 7
-                        st.session_state.cc_conservative_dte_max = 30
-                        st.session_state.cc_conservative_oi_min = 50
-                        st.session_state.cc_conservative_weekly_min = 0.3
-                        st.success("✅ Conservative reset to defaults!")
-                        st.rerun()
+                
+                st.button("🔄 Reset Conservative", use_container_width=True, key="reset_conservative",
+                          on_click=_reset_cc_preset, args=("conservative",))
             
             # Medium Expander
             with st.expander("🟡 Medium Filter Configuration", expanded=False):
-                col1, col2 = st.columns(2)
-                with col1:
-                    med_delta_min = st.number_input("Min Delta", value=st.session_state.cc_medium_delta_min, min_value=0.0, max_value=1.0, step=0.01, key="med_delta_min_input")
-                    med_delta_max = st.number_input("Max Delta", value=st.session_state.cc_medium_delta_max, min_value=0.0, max_value=1.0, step=0.01, key="med_delta_max_input")
-                    med_dte_min = st.number_input("Min DTE", value=st.session_state.cc_medium_dte_min, min_value=0, max_value=365, step=1, key="med_dte_min_input")
-                with col2:
-                    med_dte_max = st.number_input("Max DTE", value=st.session_state.cc_medium_dte_max, min_value=0, max_value=365, step=1, key="med_dte_max_input")
-                    med_oi_min = st.number_input("Min Open Interest", value=st.session_state.cc_medium_oi_min, min_value=0, step=10, key="med_oi_min_input")
-                    med_weekly_min = st.number_input("Min Weekly Return %", value=st.session_state.cc_medium_weekly_min, min_value=0.0, step=0.1, key="med_weekly_min_input")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("💾 Commit Medium", use_container_width=True, key="commit_medium"):
+                # Inputs are batched in a form so edits only rerun on Commit
+                with st.form("cc_medium_form"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        med_delta_min = st.number_input("Min Delta", value=st.session_state.cc_medium_delta_min, min_value=0.0, max_value=1.0, step=0.01, key="med_delta_min_input")
+                        med_delta_max = st.number_input("Max Delta", value=st.session_state.cc_medium_delta_max, min_value=0.0, max_value=1.0, step=0.01, key="med_delta_max_input")
+                        med_dte_min = st.number_input("Min DTE", value=st.session_state.cc_medium_dte_min, min_value=0, max_value=365, step=1, key="med_dte_min_input")
+                    with col2:
+                        med_dte_max = st.number_input("Max DTE", value=st.session_state.cc_medium_dte_max, min_value=0, max_value=365, step=1, key="med_dte_max_input")
+                        med_oi_min = st.number_input("Min Open Interest", value=st.session_state.cc_medium_oi_min, min_value=0, step=10, key="med_oi_min_input")
+                        med_weekly_min = st.number_input("Min Weekly Return %", value=st.session_state.cc_medium_weekly_min, min_value=0.0, step=0.1, key="med_weekly_min_input")
+                    
+                    if st.form_submit_button("💾 Commit Medium", use_container_width=True):
                         st.session_state.cc_medium_delta_min = med_delta_min
                         st.session_state.cc_medium_delta_max = med_delta_max
                         st.session_state.cc_medium_dte_min = med_dte_min
@@ -2962,33 +2912,25 @@ elif page == "CC Dashboard":
                         st.session_state.cc_medium_oi_min = med_oi_min
                         st.session_state.cc_medium_weekly_min = med_weekly_min
                         st.success("✅ Medium criteria committed!")
-                        st.rerun()
-                with col2:
-                    if st.button("🔄 Reset Medium", use_container_width=True, key="reset_medium"):
-                        st.session_state.cc_medium_delta_min = 0.15
-                        st.session_state.cc_medium_delta_max = 0.30
-                        st.session_state.cc_medium_dte_min = 7
-                        st.session_state.cc_medium_dte_max = 30
-                        st.session_state.cc_medium_oi_min = 50
-                        st.session_state.cc_medium_weekly_min = 0.3
-                        st.success("✅ Medium reset to defaults!")
-                        st.rerun()
+                
+                st.button("🔄 Reset Medium", use_container_width=True, key="reset_medium",
+                          on_click=_reset_cc_preset, args=("medium",))
             
             # Aggressive Expander
             with st.expander("🔴 Aggressive Filter Configuration", expanded=False):
-                col1, col2 = st.columns(2)
-                with col1:
-                    agg_delta_min = st.number_input("Min Delta", value=st.session_state.cc_aggressive_delta_min, min_value=0.0, max_value=1.0, step=0.01, key="agg_delta_min_input")
-                    agg_delta_max = st.number_input("Max Delta", value=st.session_state.cc_aggressive_delta_max, min_value=0.0, max_value=1.0, step=0.01, key="agg_delta_max_input")
-                    agg_dte_min = st.number_input("Min DTE", value=st.session_state.cc_aggressive_dte_min, min_value=0, max_value=365, step=1, key="agg_dte_min_input")
-                with col2:
-                    agg_dte_max = st.number_input("Max DTE", value=st.session_state.cc_aggressive_dte_max, min_value=0, max_value=365, step=1, key="agg_dte_max_input")
-                    agg_oi_min = st.number_input("Min Open Interest", value=st.session_state.cc_aggressive_oi_min, min_value=0, step=10, key="agg_oi_min_input")
-                    agg_weekly_min = st.number_input("Min Weekly Return %", value=st.session_state.cc_aggressive_weekly_min, min_value=0.0, step=0.1, key="agg_weekly_min_input")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("💾 Commit Aggressive", use_container_width=True, key="commit_aggressive"):
+                # Inputs are batched in a form so edits only rerun on Commit
+                with st.form("cc_aggressive_form"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        agg_delta_min = st.number_input("Min Delta", value=st.session_state.cc_aggressive_delta_min, min_value=0.0, max_value=1.0, step=0.01, key="agg_delta_min_input")
+                        agg_delta_max = st.number_input("Max Delta", value=st.session_state.cc_aggressive_delta_max, min_value=0.0, max_value=1.0, step=0.01, key="agg_delta_max_input")
+                        agg_dte_min = st.number_input("Min DTE", value=st.session_state.cc_aggressive_dte_min, min_value=0, max_value=365, step=1, key="agg_dte_min_input")
+                    with col2:
+                        agg_dte_max = st.number_input("Max DTE", value=st.session_state.cc_aggressive_dte_max, min_value=0, max_value=365, step=1, key="agg_dte_max_input")
+                        agg_oi_min = st.number_input("Min Open Interest", value=st.session_state.cc_aggressive_oi_min, min_value=0, step=10, key="agg_oi_min_input")
+                        agg_weekly_min = st.number_input("Min Weekly Return %", value=st.session_state.cc_aggressive_weekly_min, min_value=0.0, step=0.1, key="agg_weekly_min_input")
+                    
+                    if st.form_submit_button("💾 Commit Aggressive", use_container_width=True):
                         st.session_state.cc_aggressive_delta_min = agg_delta_min
                         st.session_state.cc_aggressive_delta_max = agg_delta_max
                         st.session_state.cc_aggressive_dte_min = agg_dte_min
@@ -2996,130 +2938,31 @@ elif page == "CC Dashboard":
                         st.session_state.cc_aggressive_oi_min = agg_oi_min
                         st.session_state.cc_aggressive_weekly_min = agg_weekly_min
                         st.success("✅ Aggressive criteria committed!")
-                        st.rerun()
-                with col2:
-                    if st.button("🔄 Reset Aggressive", use_container_width=True, key="reset_aggressive"):
-                        st.session_state.cc_aggressive_delta_min = 0.20
-                        st.session_state.cc_aggressive_delta_max = 0.40
-                        st.session_state.cc_aggressive_dte_min = 7
-                        st.session_state.cc_aggressive_dte_max = 21
-                        st.session_state.cc_aggressive_oi_min = 25
-                        st.session_state.cc_aggressive_weekly_min = 0.3
-                        st.success("✅ Aggressive reset to defaults!")
-                        st.rerun()
+                
+                st.button("🔄 Reset Aggressive", use_container_width=True, key="reset_aggressive",
+                          on_click=_reset_cc_preset, args=("aggressive",))
             
             st.write("")
             st.write("---")
             
-            # Display dataframe
-            display_opp = opp_df[['Select', 'Qty', 'symbol', 'current_price', 'strike', 'expiration', 'dte', 'delta', 'premium', 'weekly_return_pct', 'rsi', 'iv_rank', 'spread_pct', 'open_interest', 'volume', 'max_contracts']].copy()
-            
-            # Calculate Available column (remaining contracts)
-            display_opp['Available'] = display_opp['max_contracts'] - display_opp['Qty']
-            
-            # Add visual indicator to Available column
-            def format_available(val):
-                if val > 0:
-                    return f"🟢 {int(val)}"  # Green circle for available
-                else:
-                    return f"⚫ {int(val)}"  # Black circle for none available
-            
-            display_opp['Available_Display'] = display_opp['Available'].apply(format_available)
-            
-            # Rename columns
-            display_opp.columns = ['Select', 'Qty', 'Symbol', 'Stock Price', 'Strike', 'Expiration', 'DTE', 'Delta', 'Premium', 'Weekly %', 'RSI', 'IV Rank', 'Spread %', 'OI', 'Volume', 'max_contracts', 'Available', 'Available_Display']
-            
-            # Format RSI with emoji indicators
-            def format_rsi(val):
-                if val is None or val != val:  # Check for None or NaN
-                    return "N/A"
-                if val > 70:
-                    return f"🔴 {val:.0f}"  # Red = Overbought
-                elif val < 30:
-                    return f"🟡 {val:.0f}"  # Yellow = Oversold
-                else:
-                    return f"🟢 {val:.0f}"  # Green = Normal
-            
-            # Format IV Rank with emoji indicators
-            def format_iv_rank(val):
-                if val is None or val != val:  # Check for None or NaN
-                    return "N/A"
-                if val > 75:
-                    return f"🟢 {val:.0f}%"  # Green = High IV (good for selling)
-                elif val < 25:
-                    return f"🔴 {val:.0f}%"  # Red = Low IV (bad for selling)
-                else:
-                    return f"🟡 {val:.0f}%"  # Yellow = Medium IV
-            
-            # Format Spread % with emoji indicators
-            def format_spread(val):
-                if val is None or val != val:  # Check for None or NaN
-                    return "N/A"
-                if val < 2:
-                    return f"🟢 {val:.1f}%"  # Green = Tight spread (good)
-                elif val < 5:
-                    return f"🟡 {val:.1f}%"  # Yellow = Medium spread
-                else:
-                    return f"🔴 {val:.1f}%"  # Red = Wide spread (bad)
-            
-            # Format Delta with emoji indicators (dynamic based on active preset)
-            def format_delta(val):
-                # Skip if already formatted (contains emoji)
-                if isinstance(val, str) and any(emoji in val for emoji in ['🟢', '🟡', '🔴']):
-                    return val
-                # Handle None or NaN
-                if val is None or (isinstance(val, float) and val != val):
-                    return "N/A"
-                # Convert to float if string
-                if isinstance(val, str):
-                    try:
-                        val = float(val)
-                    except (ValueError, TypeError):
-                        return "N/A"
-                
-                # Get active preset range (if any)
-                if 'cc_active_preset' in st.session_state:
-                    preset = st.session_state.cc_active_preset
-                    
-                    if preset == 'conservative':
-                        delta_min = st.session_state.cc_conservative_delta_min
-                        delta_max = st.session_state.cc_conservative_delta_max
-                    elif preset == 'medium':
-                        delta_min = st.session_state.cc_medium_delta_min
-                        delta_max = st.session_state.cc_medium_delta_max
-                    elif preset == 'aggressive':
-                        delta_min = st.session_state.cc_aggressive_delta_min
-                        delta_max = st.session_state.cc_aggressive_delta_max
-                    else:
-                        # No preset active, return plain value
-                        return f"{val:.3f}"
-                    
-                    # Apply dynamic color coding based on preset range
-                    abs_val = abs(val)
-                    tolerance = 0.05  # ±0.05 for yellow zone
-                    
-                    if delta_min <= abs_val <= delta_max:
-                        return f"🟢 {val:.3f}"  # Green = Within range
-                    elif (delta_min - tolerance) <= abs_val <= (delta_max + tolerance):
-                        return f"🟡 {val:.3f}"  # Yellow = Close to range
-                    else:
-                        return f"🔴 {val:.3f}"  # Red = Outside range
-                else:
-                    # No preset active, return plain value
-                    return f"{val:.3f}"
-            
-            # Apply formatting
-            display_opp['Stock Price'] = display_opp['Stock Price'].apply(lambda x: f"${x:.2f}")
-            display_opp['Strike'] = display_opp['Strike'].apply(lambda x: f"${x:.2f}")
-            display_opp['Delta'] = display_opp['Delta'].apply(format_delta)
-            display_opp['Premium'] = display_opp['Premium'].apply(lambda x: f"${x:.2f}")
-            display_opp['Weekly %'] = display_opp['Weekly %'].apply(lambda x: f"{x:.2f}%")
-            display_opp['RSI'] = display_opp['RSI'].apply(format_rsi)
-            display_opp['IV Rank'] = display_opp['IV Rank'].apply(format_iv_rank)
-            display_opp['Spread %'] = display_opp['Spread %'].apply(format_spread)
+            # Display dataframe - formatted columns are cached per scan / active preset range
+            from utils.covered_calls import build_cc_opportunities_display
+            preset = st.session_state.get('cc_active_preset')
+            if preset in ('conservative', 'medium', 'aggressive'):
+                delta_range = (st.session_state[f'cc_{preset}_delta_min'], st.session_state[f'cc_{preset}_delta_max'])
+            else:
+                delta_range = None
+            display_opp = build_cc_opportunities_display(static_df, delta_range)
             
-            # Reorder columns to put Available after Qty, Stock Price after Symbol (use display version with emoji)
-            display_opp = display_opp[['Select', 'Qty', 'Available_Display', 'Symbol', 'Stock Price', 'Strike', 'Expiration', 'DTE', 'Delta', 'Premium', 'Weekly %', 'RSI', 'IV Rank', 'Spread %', 'OI', 'Volume']]
+            # Live columns depend on Select/Qty, so they are added outside the cache
+            # Available = remaining contracts (🟢 = available, ⚫ = none available)
+            available = static_df['max_contracts'].to_numpy(dtype=np.int32) - qty_arr
+            live_cols = pd.DataFrame({
+                'Select': select_arr,
+                'Qty': qty_arr,
+                'Available': np.char.add(np.where(available > 0, '🟢 ', '⚫ '), available.astype(str)),
+            }, index=display_opp.index)
+            display_opp = pd.concat([live_cols, display_opp], axis=1)
             
             edited_opp = st.data_editor(
                 display_opp,
@@ -3140,7 +2983,7 @@ elif page == "CC Dashboard":
                         default=1,
                         format="%d"
                     ),
-                    "Available_Display": st.column_config.TextColumn(
+                    "Available": st.column_config.TextColumn(
                         "Available",
                         help="Remaining contracts available for this stock (🟢 = available, ⚫ = none)",
                         disabled=True
@@ -3150,25 +2993,32 @@ elif page == "CC Dashboard":
             )
             
             # Update session state with manual selections and quantities from data_editor
-            if 'Select' in edited_opp.columns:
-                st.session_state.cc_opportunities['Select'] = edited_opp['Select']
-            if 'Qty' in edited_opp.columns:
-                st.session_state.cc_opportunities['Qty'] = edited_opp['Qty']       
+            # (in-place copies into the session-state arrays, skipped when nothing was edited)
+            new_select = edited_opp['Select'].to_numpy(dtype=bool)
+            if not np.array_equal(new_select, select_arr):
+                np.copyto(select_arr, new_select)
+            new_qty = edited_opp['Qty'].fillna(1).to_numpy()
+            if not np.array_equal(new_qty, qty_arr):
+                np.copyto(qty_arr, new_qty, casting='unsafe')
             st.divider()
             
             # Order Summary Card
-            selected_rows = st.session_state.cc_opportunities[st.session_state.cc_opportunities['Select'] == True]
+            selected_qty = qty_arr[select_arr]
+            # Premium * Qty per row, shared by the totals and the per-symbol breakdown
+            selected_prem = static_df['premium'].to_numpy(dtype=float)[select_arr] * selected_qty
+            selected_rows = static_df[select_arr].assign(Qty=selected_qty)
             
             if len(selected_rows) > 0:
                 st.subheader("💰 Order Summary")
                 
                 # Calculate totals (multiply by quantity)
-                total_contracts = selected_rows['Qty'].sum()  # Sum of all quantities
-                total_premium = (selected_rows['premium'] * selected_rows['Qty']).sum()  # Premium * Qty
+                # (plain NumPy reductions over the selected slices; nanmean matches pandas' NaN skipping)
+                total_contracts = int(selected_qty.sum())  # Sum of all quantities
+                total_premium = float(selected_prem.sum())  # Premium * Qty
                 total_shares_covered = total_contracts * 100  # Each contract covers 100 shares
-                avg_weekly_return = selected_rows['weekly_return_pct'].mean()
-                avg_delta = selected_rows['delta'].mean()
-                avg_dte = selected_rows['dte'].mean()
+                avg_weekly_return = float(np.nanmean(static_df['weekly_return_pct'].to_numpy(dtype=float)[select_arr]))
+                avg_delta = float(np.nanmean(static_df['delta'].to_numpy(dtype=float)[select_arr]))
+                avg_dte = float(static_df['dte'].to_numpy()[select_arr].mean())
                 
                 # Display summary metrics
                 col1, col2, col3, col4, col5 = st.columns(5)
@@ -3195,11 +3045,14 @@ elif page == "CC Dashboard":
                 
                 # Show selected opportunities grouped by symbol
                 st.write("**Selected Opportunities:**")
-                for symbol in selected_rows['symbol'].unique():
-                    symbol_rows = selected_rows[selected_rows['symbol'] == symbol]
-                    symbol_premium = (symbol_rows['premium'] * symbol_rows['Qty']).sum()
-                    symbol_contracts = symbol_rows['Qty'].sum()
-                    st.write(f"- **{symbol}**: {int(symbol_contracts)} contract(s) = ${symbol_premium:.2f} premium")
+                symbol_codes = st.session_state.cc_symbol_codes[select_arr]
+                n_symbols = len(st.session_state.cc_symbols)
+                symbol_contracts = np.bincount(symbol_codes, weights=selected_qty, minlength=n_symbols)
+                symbol_premium = np.bincount(symbol_codes, weights=selected_prem, minlength=n_symbols)
+                # List symbols in the order they first appear in the selection
+                present, first_pos = np.unique(symbol_codes, return_index=True)
+                for code in present[np.argsort(first_pos)]:
+                    st.write(f"- **{st.session_state.cc_symbols[code]}**: {int(symbol_contracts[code])} contract(s) = ${symbol_premium[code]:.2f} premium")
                 
                 st.write("")
                 
@@ -3257,27 +3110,24 @@ elif page == "CC Dashboard":
                                         st.write("### 🧪 Dry Run Results")
                                         st.write("")
                                         
-                                        for idx, row in selected_rows.iterrows():
-                                            st.write(f"🧪 [DRY RUN] Would submit: **{row['symbol']}** ${row['strike']} Call x{int(row['Qty'])} @ ${row['premium']:.2f}")
+                                        for r in selected_rows[['symbol', 'strike', 'Qty', 'premium']].itertuples(index=False):
+                                            st.write(f"🧪 [DRY RUN] Would submit: **{r.symbol}** ${r.strike} Call x{int(r.Qty)} @ ${r.premium:.2f}")
                                         
                                         st.success(f"🧪 **DRY RUN COMPLETE!** {len(selected_rows)} orders simulated successfully")
                                         st.info("💡 Toggle off 'Dry Run Mode' to submit real orders")
                                     
                                     else:
-                                        # LIVE - Actually submit
-                                        from utils.tastytrade_api import TastytradeAPI
-                                        api = TastytradeAPI()
+                                        # LIVE - Actually submit (reuse the session's authenticated client)
+                                        api = st.session_state.api
                                         
                                         # Prepare orders
-                                        orders = []
-                                        for idx, row in selected_rows.iterrows():
-                                            orders.append({
-                                                'symbol': row['symbol'],
-                                                'strike': row['strike'],
-                                                'expiration': row['expiration'],
-                                                'quantity': int(row['Qty']),
-                                                'price': round(row['bid'], 2)  # Use bid price for reliable fills
-                                            })
+                                        orders = (
+                                            selected_rows[['symbol', 'strike', 'expiration', 'Qty', 'bid']]
+                                            .rename(columns={'Qty': 'quantity', 'bid': 'price'})
+                                            .astype({'quantity': 'int64'})
+                                            .round({'price': 2})  # Use bid price for reliable fills
+                                            .to_dict(orient='records')
+                                        )
                                         
                                         # Submit batch
                                         results = api.submit_covered_call_orders_batch(account_number, orders)
@@ -3298,9 +3148,14 @@ elif page == "CC Dashboard":
                                             st.info("🔄 Refreshing positions to update available contracts...")
                                             try:
                                                 import time
-                                                from utils.covered_calls import get_eligible_stock_positions
+                                                from utils.covered_calls import get_eligible_stock_positions, get_eligible_stock_positions_cached
+                                                # Positions just changed - drop cached results and fetch fresh
+                                                get_eligible_stock_positions_cached.clear()
                                                 eligible_holdings, breakdown = get_eligible_stock_positions(api, account_number)
                                                 st.session_state.cc_eligible_holdings = eligible_holdings
+                                                st.session_state.cc_max_contracts_arr = np.fromiter(
+                                                    (h.get('max_contracts', 0) for h in eligible_holdings), dtype=np.int32, count=len(eligible_holdings)
+                                                )
                                                 st.session_state.cc_breakdown = breakdown
                                                 st.success(f"✅ Positions refreshed! {len(eligible_holdings)} eligible holdings found.")
                                                 # Trigger page rerun to update the display
@@ -3326,6 +3181,9 @@ elif page == "CC Dashboard":
             else:
                 st.info("👆 Select opportunities using the checkboxes or preset filters above")
 
+        if 'cc_opportunities' in st.session_state and len(st.session_state.cc_opportunities) > 0:
+            _render_cc_opportunities_panel()
+
     
     else:
         st.info("👆 Click 'Fetch Portfolio Positions' to get started")
@@ -3613,9 +3471,8 @@ elif page == "PMCC Dashboard":
         st.markdown("### ⚠️ Assignment Risk Alerts")
         
         from utils.pmcc_scanner import check_assignment_risk
-        from utils.tradier_api import TradierAPI
         
-        tradier = TradierAPI()
+        tradier = _get_tradier()
         
         risk_alerts = []
         
@@ -3863,9 +3720,8 @@ elif page == "PMCC Dashboard":
             try:
                 with st.status("Scanning for LEAP opportunities...", expanded=True) as status:
                     from utils.pmcc_scanner import scan_leap_options
-                    from utils.tradier_api import TradierAPI
                     
-                    tradier = TradierAPI()
+                    tradier = _get_tradier()
                     
                     st.write(f"🔍 Scanning {len(watchlist)} symbols...")
                     st.write(f"🎯 Filters: DTE {dte_min}-{dte_max}, Delta {delta_min:.2f}-{delta_max:.2f}, Min OI {min_oi}")
@@ -4034,9 +3890,8 @@ elif page == "PMCC Dashboard":
                 try:
                     with st.status("Scanning for short call opportunities...", expanded=True) as status:
                         from utils.pmcc_scanner import scan_short_call_opportunities
-                        from utils.tradier_api import TradierAPI
                         
-                        tradier = TradierAPI()
+                        tradier = _get_tradier()
                         
                         st.write(f"🔍 Scanning {selected_leap['underlying']}...")
                         st.write(f"🎯 Filters: DTE {short_dte_min}-{short_dte_max}, Max Delta {short_delta_max:.2f}, Min Premium ${min_premium}")
@@ -1,8 +1,14 @@
 # Covered Calls utility functions - Refactored for flexible workflow
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
 import streamlit as st
 
+# Max concurrent Tradier requests during the CC pre-scan
+PRESCAN_MAX_WORKERS = 10
+
 def get_eligible_stock_positions(api, account_number):
     """
     Fetch stock positions that are eligible for covered calls
@@ -213,9 +219,218 @@ def get_eligible_stock_positions(api, account_number):
         return [], {}
 
 
+@st.cache_data(ttl=60, show_spinner=False)
+def get_eligible_stock_positions_cached(_api, account_number):
+    """
+    Cached wrapper around get_eligible_stock_positions, keyed on account number
+    
+    The API client is excluded from the cache key (leading underscore). Repeat
+    fetches for the same account within 60 seconds are served from memory.
+    Empty results can't be told apart from failed fetches, so callers should
+    clear them (get_eligible_stock_positions_cached.clear(api, account_number)).
+    """
+    return get_eligible_stock_positions(_api, account_number)
+
+
+@st.cache_data(show_spinner=False)
+def build_eligible_positions_table(available_holdings):
+    """
+    Build the eligible positions table (Table 2) for display
+    
+    The table only depends on the holdings, so it is cached and reused across
+    reruns until positions are refetched. Price and Market Value stay numeric;
+    the dashboard formats them client-side via st.column_config.NumberColumn.
+    
+    Returns:
+        DataFrame with Symbol, Shares, Price, Market Value, Max Contracts columns
+    """
+    eligible_df = pd.DataFrame(available_holdings)
+    eligible_display = eligible_df[['symbol', 'quantity', 'current_price', 'market_value', 'max_contracts']].copy()
+    eligible_display.columns = ['Symbol', 'Shares', 'Price', 'Market Value', 'Max Contracts']
+    
+    return eligible_display
+
+
+def _bucket_with_emoji(values, text, bins, prefixes):
+    """
+    Prefix formatted values with the emoji of the bucket they fall into
+    
+    Args:
+        values: Float array being bucketed (NaN -> 'N/A')
+        text: Pre-formatted string array for values
+        bins: Right-inclusive bucket edges for pd.cut
+        prefixes: Emoji prefix per bucket
+    
+    Returns:
+        String array of '<emoji> <text>' or 'N/A'
+    """
+    codes = pd.cut(values, bins=bins, labels=False)  # NaN stays NaN
+    missing = np.isnan(codes)
+    prefix = np.asarray(prefixes)[np.where(missing, 0, codes).astype(np.intp)]
+    return np.where(missing, 'N/A', np.char.add(prefix, text))
+
+
+@st.cache_data(show_spinner=False)
+def build_cc_opportunities_display(opportunities_df, delta_range=None):
+    """
+    Build the formatted (display-only) columns of the CC opportunities table
+    
+    Depends only on the scanned opportunities and the active preset's delta
+    range, so it is cached across reruns; the live Select / Qty / Available
+    columns are added by the dashboard on top of the cached frame.
+    
+    Args:
+        opportunities_df: Static opportunities DataFrame from the pre-scan
+        delta_range: (delta_min, delta_max) of the active preset for Delta color coding, or None
+    
+    Returns:
+        DataFrame with Symbol, Stock Price, Strike, Expiration, DTE, Delta, Premium,
+        Weekly %, RSI, IV Rank, Spread %, OI, Volume columns
+    """
+    # Every numeric column is replaced by its text form, so build the display
+    # columns straight from the source arrays (in display order) instead of
+    # copying the frame and overwriting it column by column
+    def _num(col):
+        return opportunities_df[col].to_numpy(dtype=float)
+    
+    # Format Delta with emoji indicators (dynamic based on active preset)
+    delta = _num('delta')
+    delta_text = np.char.mod('%.3f', delta)
+    if delta_range is not None:
+        delta_min, delta_max = delta_range
+        tolerance = 0.05  # ±0.05 for yellow zone
+        abs_delta = np.abs(delta)
+        delta_text = np.select(
+            [(delta_min <= abs_delta) & (abs_delta <= delta_max),
+             ((delta_min - tolerance) <= abs_delta) & (abs_delta <= (delta_max + tolerance))],
+            [np.char.add('🟢 ', delta_text), np.char.add('🟡 ', delta_text)],  # Green = Within range, Yellow = Close to range
+            default=np.char.add('🔴 ', delta_text)  # Red = Outside range
+        )
+    # No preset active: plain value
+    delta_text = np.where(np.isnan(delta), 'N/A', delta_text)
+    
+    # Format RSI, IV Rank and Spread % with emoji indicators (one pd.cut per column)
+    rsi = _num('rsi')
+    rsi_text = _bucket_with_emoji(
+        rsi, np.char.mod('%.0f', rsi),
+        [-np.inf, np.nextafter(30, -np.inf), 70, np.inf],  # < 30 | 30-70 | > 70
+        ['🟡 ', '🟢 ', '🔴 ']  # Yellow = Oversold, Green = Normal, Red = Overbought
+    )
+    
+    iv_rank = _num('iv_rank')
+    iv_rank_text = _bucket_with_emoji(
+        iv_rank, np.char.mod('%.0f%%', iv_rank),
+        [-np.inf, np.nextafter(25, -np.inf), 75, np.inf],  # < 25 | 25-75 | > 75
+        ['🔴 ', '🟡 ', '🟢 ']  # Red = Low IV, Yellow = Medium IV, Green = High IV (good for selling)
+    )
+    
+    spread = _num('spread_pct')
+    spread_text = _bucket_with_emoji(
+        spread, np.char.mod('%.1f%%', spread),
+        [-np.inf, np.nextafter(2, -np.inf), np.nextafter(5, -np.inf), np.inf],  # < 2 | 2-5 | >= 5
+        ['🟢 ', '🟡 ', '🔴 ']  # Green = Tight spread, Yellow = Medium, Red = Wide spread (bad)
+    )
+    
+    display_opp = pd.DataFrame({
+        'Symbol': opportunities_df['symbol'].array,
+        'Stock Price': np.char.mod('$%.2f', _num('current_price')),
+        'Strike': np.char.mod('$%.2f', _num('strike')),
+        'Expiration': opportunities_df['expiration'].array,
+        'DTE': opportunities_df['dte'].to_numpy(dtype=np.int32),
+        'Delta': delta_text,
+        'Premium': np.char.mod('$%.2f', _num('premium')),
+        'Weekly %': np.char.mod('%.2f%%', _num('weekly_return_pct')),
+        'RSI': rsi_text,
+        'IV Rank': iv_rank_text,
+        'Spread %': spread_text,
+        'OI': opportunities_df['open_interest'].to_numpy(dtype=np.int32),
+        'Volume': opportunities_df['volume'].to_numpy(dtype=np.int32),
+    }, index=opportunities_df.index, copy=False)
+    
+    return display_opp
+
+
+def select_best_per_ticker(df, delta_min, delta_max, dte_min, dte_max, oi_min, weekly_min, qty_mode='conservative'):
+    """
+    For each ticker, find the BEST opportunity (highest weekly return) that matches criteria.
+    If no match, relax criteria to find closest match.
+
+    Every row is ranked into a relaxation tier in one vectorized pass, then a
+    single NumPy lexsort picks the best row per ticker.
+
+    Args:
+        df: DataFrame of all opportunities
+        delta_min, delta_max, dte_min, dte_max, oi_min, weekly_min: Filter criteria
+        qty_mode: 'conservative' (1), 'medium' (50%), 'aggressive' (100%)
+
+    Returns:
+        Series of qty to select, indexed by the chosen opportunity rows
+    """
+    # Atomic conditions, evaluated once on the raw NumPy columns
+    delta = df['delta'].to_numpy()
+    dte = df['dte'].to_numpy()
+    delta_ok = (delta >= delta_min) & (delta <= delta_max)
+    dte_ok = (dte >= dte_min) & (dte <= dte_max)
+    oi_ok = df['open_interest'].to_numpy() >= oi_min
+    weekly_ok = df['weekly_return_pct'].to_numpy() >= weekly_min
+
+    # Tier 0 = all criteria, 1 = relax weekly return, 2 = relax weekly return and OI
+    # Delta and DTE are HARD LIMITS - rows outside them land in tier 3 and are dropped
+    # Each tier mask extends the previous one, so one & per tier is enough
+    m_relax_oi = delta_ok & dte_ok
+    m_relax_weekly = m_relax_oi & oi_ok
+    m_full = m_relax_weekly & weekly_ok
+    # Masks are nested, so the tier is 3 minus the number of masks a row satisfies
+    tier = 3 - (m_relax_oi.astype(np.int8) + m_relax_weekly + m_full)
+
+    # Target delta is the middle of the range
+    target_delta = (delta_min + delta_max) / 2
+
+    # Work on the in-range rows only; symbols become integer group ids
+    keep = tier < 3
+    group_ids, _ = pd.factorize(df['symbol'].to_numpy()[keep])
+    delta_distance = np.abs(delta[keep] - target_delta)
+
+    # Best match per ticker: lowest tier, then closest to target delta, then highest weekly return.
+    # One lexsort (last key is primary) groups rows by ticker in rank order, so the
+    # first row of each group is that ticker's best opportunity.
+    order = np.lexsort((-df['weekly_return_pct'].to_numpy()[keep], delta_distance, tier[keep], group_ids))
+    sorted_ids = group_ids[order]
+    is_first = np.ones(len(order), dtype=bool)
+    is_first[1:] = sorted_ids[1:] != sorted_ids[:-1]
+    best_pos = order[is_first]
+
+    # Calculate quantity based on mode
+    max_contracts = df['max_contracts'].to_numpy()[keep][best_pos]
+    if qty_mode == 'conservative':
+        qty = np.ones(len(best_pos), dtype=int)
+    elif qty_mode == 'medium':
+        qty = np.maximum(1, np.ceil(max_contracts * 0.5)).astype(int)
+    else:  # aggressive
+        qty = max_contracts.astype(int)
+
+    return pd.Series(qty, index=df.index[keep][best_pos])
+
+
+def _fetch_prescan_data(tradier_api, symbol, min_dte, max_dte):
+    """
+    Fetch RSI, IV Rank and option chain for one symbol (runs in a worker thread)
+    
+    Returns:
+        Tuple: (rsi, iv_rank, tradier_chain)
+    """
+    rsi = tradier_api.get_rsi(symbol)
+    iv_rank = tradier_api.get_iv_rank(symbol)
+    tradier_chain = tradier_api.get_option_chains(symbol, min_dte=min_dte, max_dte=max_dte)
+    return rsi, iv_rank, tradier_chain
+
+
 def pre_scan_covered_calls(api, tradier_api, holdings, min_prescan_delta=0.10, max_prescan_delta=0.50, min_dte=7, max_dte=14):
     """
     Pre-scan option chains for covered call opportunities WITH DETAILED LOGGING
+    
+    Tradier requests for all symbols are issued concurrently; results are then
+    processed (and logged) on the Streamlit thread in the original holdings order.
     """
     opportunities = []
     
@@ -223,6 +438,16 @@ def pre_scan_covered_calls(api, tradier_api, holdings, min_prescan_delta=0.10, m
     st.write(f"🎯 Pre-scan filters: Delta {min_prescan_delta:.2f}-{max_prescan_delta:.2f}, DTE {min_dte}-{max_dte}")
     st.write("")
     
+    # Fetch indicators and option chains in parallel (HTTP-bound, so threads scale well)
+    scan_symbols = list(dict.fromkeys(h['symbol'] for h in holdings if h['current_price'] > 0))
+    prescan_futures = {}
+    if scan_symbols:
+        st.write(f"🔍 Fetching option chains and indicators for {len(scan_symbols)} stocks...")
+        with ThreadPoolExecutor(max_workers=min(PRESCAN_MAX_WORKERS, len(scan_symbols))) as executor:
+            for symbol in scan_symbols:
+                prescan_futures[symbol] = executor.submit(_fetch_prescan_data, tradier_api, symbol, min_dte, max_dte)
+        st.write("")
+    
     for idx, holding in enumerate(holdings, 1):
         symbol = holding['symbol']
         quantity = holding['quantity']
@@ -236,14 +461,8 @@ def pre_scan_covered_calls(api, tradier_api, holdings, min_prescan_delta=0.10, m
             continue
         
         try:
-            # Get option chain from Tradier (includes greeks!)
-            st.write(f"  🔍 Fetching option chain and indicators...")
-            
-            # Fetch RSI and IV Rank for this stock
-            rsi = tradier_api.get_rsi(symbol)
-            iv_rank = tradier_api.get_iv_rank(symbol)
-            
-            tradier_chain = tradier_api.get_option_chains(symbol, min_dte=min_dte, max_dte=max_dte)
+            # Option chain from Tradier (includes greeks!) plus RSI and IV Rank, fetched above
+            rsi, iv_rank, tradier_chain = prescan_futures[symbol].result()
             
             if not tradier_chain or not tradier_chain.get('options'):
                 st.warning(f"  ⚠️ No option chain data returned for {symbol}")
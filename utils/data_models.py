@@ -8,6 +8,7 @@ import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from dataclasses import dataclass, asdict
+from functools import lru_cache
 from pathlib import Path
 
 # Data directory
@@ -20,6 +21,12 @@ POSITIONS_FILE = DATA_DIR / 'stock_positions.json'
 PREMIUM_SUMMARY_FILE = DATA_DIR / 'premium_summary.json'
 
 
+@lru_cache(maxsize=1024)
+def _parse_date(date_str: str) -> datetime:
+    """Parse a YYYY-MM-DD string to a (midnight) datetime, once per distinct date"""
+    return datetime.fromisoformat(date_str)
+
+
 @dataclass
 class Trade:
     """Represents a single options trade (CSP or CC)"""
@@ -51,14 +58,14 @@ class Trade:
     @property
     def days_to_expiration(self) -> int:
         """Calculate days until expiration"""
-        exp_date = datetime.strptime(self.expiration, '%Y-%m-%d')
+        exp_date = _parse_date(self.expiration)
         today = datetime.now()
         return max(0, (exp_date - today).days)
     
     @property
     def is_expired(self) -> bool:
         """Check if option has expired"""
-        exp_date = datetime.strptime(self.expiration, '%Y-%m-%d')
+        exp_date = _parse_date(self.expiration)
         return datetime.now() > exp_date
 
 
@@ -326,7 +333,21 @@ class DataStore:
     
     def recalculate_summaries(self):
         """Recalculate all premium summaries from trades"""
-        trades = self.get_all_trades()
+        self.save_summaries(self._build_summaries(self.get_all_trades()))
+    
+    def bulk_replace(self, trades: List[Trade], positions: List[StockPosition]):
+        """
+        Replace all trades and positions (full reimport) and rebuild summaries
+        
+        Writes each data file exactly once; summaries come from the given
+        trades rather than re-reading the trades file.
+        """
+        self._save_trades(trades)
+        self._save_positions(positions)
+        self._save_summaries(self._build_summaries(trades))
+    
+    def _build_summaries(self, trades: List[Trade]) -> List[PremiumSummary]:
+        """Aggregate trades into monthly premium summaries"""
         summaries = {}
         
         for trade in trades:
@@ -367,8 +388,7 @@ class DataStore:
             # Update total
             summary.total_premium = summary.csp_premium + summary.cc_premium
         
-        # Save all summaries
-        self.save_summaries(list(summaries.values()))
+        return list(summaries.values())
     
     # ==================== STATISTICS ====================
     
@@ -2,13 +2,80 @@
 
 from datetime import datetime
 from io import BytesIO
+import re
+from xml.sax.saxutils import escape
 
-def generate_ai_analysis_docx(ai_results):
-    """Generate a DOCX file from AI Analysis results"""
+# Common Unicode characters -> ASCII equivalents for the latin-1 only PDF fonts
+_SANITIZE_TABLE = str.maketrans({
+    '\u2013': '-',  # en dash
+    '\u2014': '--',  # em dash
+    '\u2018': "'",  # left single quote
+    '\u2019': "'",  # right single quote
+    '\u201c': '"',  # left double quote
+    '\u201d': '"',  # right double quote
+    '\u2026': '...',  # ellipsis
+    '\u00a0': ' ',  # non-breaking space
+    '\u2022': '*',  # bullet
+    '\u00b0': ' deg',  # degree symbol
+    '\u00ae': '(R)',  # registered trademark
+    '\u2122': '(TM)',  # trademark
+    '\u00a9': '(C)',  # copyright
+})
+
+
+def _summary_table_xml(rows, col_width=4320):
+    """
+    WordprocessingML for a 2-column 'Light Grid Accent 1' table
+    
+    Matches what python-docx's add_table + cell.text produce on the default
+    template (two 3-inch columns, widths in twentieths of a point).
+    """
+    from docx.oxml.ns import nsdecls
+    
+    cell = f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_width}"/></w:tcPr><w:p><w:r><w:t>{{}}</w:t></w:r></w:p></w:tc>'
+    body = ''.join(
+        '<w:tr>' + cell.format(escape(label)) + cell.format(escape(value)) + '</w:tr>'
+        for label, value in rows
+    )
+    return (
+        f'<w:tbl {nsdecls("w")}>'
+        '<w:tblPr><w:tblStyle w:val="LightGrid-Accent1"/><w:tblW w:type="auto" w:w="0"/>'
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+        f'<w:tblGrid><w:gridCol w:w="{col_width}"/><w:gridCol w:w="{col_width}"/></w:tblGrid>'
+        f'{body}</w:tbl>'
+    )
+
+
+# Line kinds of the AI analysis markdown, tried in order: header (**AAPL**),
+# field (**Business:** ...), risk, summary, sep (---). The PDF layout's looser
+# rule counts any line containing ':**' as a field.
+_LINE_PATTERN = r'(?P<header>\*\*.*(?<=\*\*)$)|(?P<field>{field})|(?P<risk>Risk:)|(?P<summary>Summary:)|(?P<sep>---)'
+_LINE_RE = re.compile(_LINE_PATTERN.format(field=r'\*\*.*:\*\*'))
+_LOOSE_LINE_RE = re.compile(_LINE_PATTERN.format(field=r'.*:\*\*'))
+
+def _classify_line(line, loose_fields=False):
+    """
+    Classify one stripped line of the AI analysis markdown
+    
+    Returns one of 'header' (**AAPL**), 'field' (**Business:** ...), 'risk',
+    'summary', 'sep' (---) or 'text'. With loose_fields, any line containing
+    ':**' counts as a field (the PDF layout's rule).
+    """
+    match = (_LOOSE_LINE_RE if loose_fields else _LINE_RE).match(line)
+    return match.lastgroup if match else 'text'
+
+def generate_ai_analysis_docx(ai_results, sink=None):
+    """
+    Generate a DOCX file from AI Analysis results
+    
+    If a binary file-like sink is given the document is written straight into
+    it and None is returned; otherwise the DOCX bytes are returned.
+    """
     try:
         from docx import Document
         from docx.shared import Pt, RGBColor, Inches
         from docx.enum.text import WD_ALIGN_PARAGRAPH
+        from docx.oxml import parse_xml
         
         doc = Document()
         
@@ -26,9 +93,6 @@ def generate_ai_analysis_docx(ai_results):
         # Summary Section
         doc.add_heading('Summary', 1)
         
-        summary_table = doc.add_table(rows=4, cols=2)
-        summary_table.style = 'Light Grid Accent 1'
-        
         summary_data = [
             ('📊 Total Analyzed', str(ai_results['total_analyzed'])),
             ('✅ Safe Stocks', str(len(ai_results['safe_stocks']))),
@@ -36,12 +100,9 @@ def generate_ai_analysis_docx(ai_results):
             ('❌ Avoid Stocks', str(len(ai_results['avoid_stocks'])))
         ]
         
-        for idx, (label, value) in enumerate(summary_data):
-            row = summary_table.rows[idx]
-            row.cells[0].text = label
-            row.cells[1].text = value
-        
-        doc.add_paragraph()  # Spacing
+        # Build the whole table as one OXML fragment instead of setting cell.text per cell
+        summary_table = parse_xml(_summary_table_xml(summary_data))
+        doc.add_paragraph()._p.addprevious(summary_table)  # Table, then spacing
         
         # Full Analysis Section
         doc.add_heading('Detailed Analysis', 1)
@@ -49,67 +110,63 @@ def generate_ai_analysis_docx(ai_results):
         # Parse the markdown analysis and add to document
         analysis_text = ai_results['full_analysis']
         
-        # Split by lines and process
-        for line in analysis_text.split('\n'):
-            line = line.strip()
-            
-            if not line:
-                continue
-            
-            # Handle headers (lines starting with **)
-            if line.startswith('**') and line.endswith('**'):
-                # Stock symbol header
-                stock_name = line.strip('*')
-                heading = doc.add_heading(stock_name, 2)
-                heading.runs[0].font.color.rgb = RGBColor(0, 102, 204)
-            
-            elif line.startswith('**') and ':**' in line:
-                # Field labels (Business:, Earnings:, etc.)
-                parts = line.split(':**', 1)
-                label = parts[0].strip('*') + ':'
-                value = parts[1].strip() if len(parts) > 1 else ''
-                
-                p = doc.add_paragraph()
-                p.add_run(label).bold = True
-                p.add_run(' ' + value)
-            
-            elif line.startswith('Risk:'):
-                # Risk line with color coding
-                p = doc.add_paragraph()
-                p.add_run('Risk: ').bold = True
-                
-                if 'Low' in line:
-                    run = p.add_run(line.replace('Risk:', '').strip())
-                    run.font.color.rgb = RGBColor(0, 128, 0)  # Green
-                elif 'Medium' in line:
-                    run = p.add_run(line.replace('Risk:', '').strip())
-                    run.font.color.rgb = RGBColor(255, 165, 0)  # Orange
-                elif 'High' in line:
-                    run = p.add_run(line.replace('Risk:', '').strip())
-                    run.font.color.rgb = RGBColor(255, 0, 0)  # Red
-                else:
-                    p.add_run(line.replace('Risk:', '').strip())
-            
-            elif line.startswith('Summary:'):
-                # Summary paragraph
-                p = doc.add_paragraph()
-                p.add_run('Summary: ').bold = True
-                p.add_run(line.replace('Summary:', '').strip())
+        def add_header(line):
+            # Stock symbol header
+            heading = doc.add_heading(line.strip('*'), 2)
+            heading.runs[0].font.color.rgb = RGBColor(0, 102, 204)
+        
+        def add_field(line):
+            # Field labels (Business:, Earnings:, etc.)
+            parts = line.split(':**', 1)
+            label = parts[0].strip('*') + ':'
+            value = parts[1].strip() if len(parts) > 1 else ''
             
-            elif line.startswith('---'):
-                # Separator
-                doc.add_paragraph('_' * 50)
+            p = doc.add_paragraph()
+            p.add_run(label).bold = True
+            p.add_run(' ' + value)
+        
+        def add_risk(line):
+            # Risk line with color coding
+            p = doc.add_paragraph()
+            p.add_run('Risk: ').bold = True
             
-            else:
-                # Regular text
-                doc.add_paragraph(line)
+            run = p.add_run(line.replace('Risk:', '').strip())
+            if 'Low' in line:
+                run.font.color.rgb = RGBColor(0, 128, 0)  # Green
+            elif 'Medium' in line:
+                run.font.color.rgb = RGBColor(255, 165, 0)  # Orange
+            elif 'High' in line:
+                run.font.color.rgb = RGBColor(255, 0, 0)  # Red
+        
+        def add_summary(line):
+            # Summary paragraph
+            p = doc.add_paragraph()
+            p.add_run('Summary: ').bold = True
+            p.add_run(line.replace('Summary:', '').strip())
+        
+        handlers = {
+            'header': add_header,
+            'field': add_field,
+            'risk': add_risk,
+            'summary': add_summary,
+            'sep': lambda line: doc.add_paragraph('_' * 50),  # Separator
+            'text': doc.add_paragraph,  # Regular text
+        }
+        
+        # Classify each line once and dispatch to its handler
+        for line in analysis_text.splitlines():
+            line = line.strip()
+            if line:
+                handlers[_classify_line(line)](line)
+        
+        if sink is not None:
+            doc.save(sink)
+            return None
         
-        # Save to BytesIO
+        # Save to BytesIO and hand back its contents as a single copy
         buffer = BytesIO()
         doc.save(buffer)
-        buffer.seek(0)
-        
-        return buffer.getvalue()
+        return buffer.getbuffer().tobytes()
         
     except ImportError:
         raise Exception("python-docx library not installed. Run: pip install python-docx")
@@ -117,144 +174,135 @@ def generate_ai_analysis_docx(ai_results):
         raise Exception(f"Error generating DOCX: {str(e)}")
 
 
-def generate_ai_analysis_pdf(ai_results):
-    """Generate a PDF file from AI Analysis results"""
+def generate_ai_analysis_pdf(ai_results, sink=None):
+    """
+    Generate a PDF file from AI Analysis results
+    
+    If a binary file-like sink is given the document is written straight into
+    it and None is returned; otherwise the PDF bytes are returned.
+    """
     
     def sanitize_text(text):
         """Remove or replace characters that can't be encoded in latin-1"""
         if not text:
             return text
-        # Replace common Unicode characters with ASCII equivalents
-        replacements = {
-            '\u2013': '-',  # en dash
-            '\u2014': '--',  # em dash
-            '\u2018': "'",  # left single quote
-            '\u2019': "'",  # right single quote
-            '\u201c': '"',  # left double quote
-            '\u201d': '"',  # right double quote
-            '\u2026': '...',  # ellipsis
-            '\u00a0': ' ',  # non-breaking space
-            '\u2022': '*',  # bullet
-            '\u00b0': ' deg',  # degree symbol
-            '\u00ae': '(R)',  # registered trademark
-            '\u2122': '(TM)',  # trademark
-            '\u00a9': '(C)',  # copyright
-        }
-        for unicode_char, ascii_char in replacements.items():
-            text = text.replace(unicode_char, ascii_char)
-        
-        # Remove emojis and other non-latin-1 characters
-        # Keep only characters that can be encoded in latin-1
-        try:
-            text.encode('latin-1')
-            return text
-        except UnicodeEncodeError:
-            # If still has encoding issues, remove problematic characters
-            return ''.join(char if ord(char) < 256 else '?' for char in text)
+        # Replace common Unicode characters with ASCII equivalents, then turn any
+        # remaining non-latin-1 characters (emojis etc.) into '?'
+        return text.translate(_SANITIZE_TABLE).encode('latin-1', 'replace').decode('latin-1')
     
     try:
         from fpdf import FPDF
+        from fpdf.enums import XPos, YPos
         
         class PDF(FPDF):
             def header(self):
-                self.set_font('Arial', 'B', 16)
-                self.cell(0, 10, 'AI Stock Analysis Report', 0, 1, 'C')
-                self.set_font('Arial', 'I', 10)
-                self.cell(0, 10, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 0, 1, 'C')
+                self.set_font('Helvetica', 'B', 16)
+                self.cell(0, 10, 'AI Stock Analysis Report', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+                self.set_font('Helvetica', 'I', 10)
+                self.cell(0, 10, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
                 self.ln(5)
             
             def footer(self):
                 self.set_y(-15)
-                self.set_font('Arial', 'I', 8)
-                self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+                self.set_font('Helvetica', 'I', 8)
+                self.cell(0, 10, f'Page {self.page_no()}', align='C')
         
         pdf = PDF()
         pdf.add_page()
         pdf.set_auto_page_break(auto=True, margin=15)
         
         # Summary Section
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Summary', 0, 1)
-        pdf.set_font('Arial', '', 11)
-        
-        pdf.cell(0, 8, f"Total Analyzed: {ai_results['total_analyzed']}", 0, 1)
-        pdf.cell(0, 8, f"Safe Stocks: {len(ai_results['safe_stocks'])}", 0, 1)
-        pdf.cell(0, 8, f"Caution Stocks: {len(ai_results['caution_stocks'])}", 0, 1)
-        pdf.cell(0, 8, f"Avoid Stocks: {len(ai_results['avoid_stocks'])}", 0, 1)
+        pdf.set_font('Helvetica', 'B', 14)
+        pdf.cell(0, 10, 'Summary', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_font('Helvetica', '', 11)
+        
+        pdf.cell(0, 8, f"Total Analyzed: {ai_results['total_analyzed']}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.cell(0, 8, f"Safe Stocks: {len(ai_results['safe_stocks'])}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.cell(0, 8, f"Caution Stocks: {len(ai_results['caution_stocks'])}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.cell(0, 8, f"Avoid Stocks: {len(ai_results['avoid_stocks'])}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         pdf.ln(5)
         
         # Detailed Analysis
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Detailed Analysis', 0, 1)
+        pdf.set_font('Helvetica', 'B', 14)
+        pdf.cell(0, 10, 'Detailed Analysis', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         pdf.ln(3)
         
         analysis_text = ai_results['full_analysis']
         
-        # Parse and format the analysis
-        for line in analysis_text.split('\n'):
-            line = line.strip()
-            
-            if not line or line.startswith('---'):
-                pdf.ln(3)
-                continue
-            
+        def write_header(line):
             # Stock symbol headers
-            if line.startswith('**') and line.endswith('**'):
-                stock_name = sanitize_text(line.strip('*'))
-                pdf.set_font('Arial', 'B', 12)
-                pdf.set_text_color(0, 102, 204)
-                pdf.cell(0, 8, stock_name, 0, 1)
-                pdf.set_text_color(0, 0, 0)
-                pdf.set_font('Arial', '', 10)
-            
+            pdf.set_font('Helvetica', 'B', 12)
+            pdf.set_text_color(0, 102, 204)
+            pdf.cell(0, 8, sanitize_text(line.strip('*')), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf.set_text_color(0, 0, 0)
+            pdf.set_font('Helvetica', '', 10)
+        
+        def write_field(line):
             # Field labels
-            elif ':**' in line:
-                parts = line.split(':**', 1)
-                label = sanitize_text(parts[0].strip('*') + ':')
-                value = sanitize_text(parts[1].strip()) if len(parts) > 1 else ''
-                
-                pdf.set_font('Arial', 'B', 10)
-                pdf.cell(40, 6, label, 0, 0)
-                pdf.set_font('Arial', '', 10)
-                pdf.multi_cell(0, 6, value)
+            parts = line.split(':**', 1)
+            label = sanitize_text(parts[0].strip('*') + ':')
+            value = sanitize_text(parts[1].strip()) if len(parts) > 1 else ''
             
+            pdf.set_font('Helvetica', 'B', 10)
+            pdf.cell(40, 6, label)
+            pdf.set_font('Helvetica', '', 10)
+            pdf.multi_cell(0, 6, value, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        
+        def write_risk(line):
             # Risk line
-            elif line.startswith('Risk:'):
-                pdf.set_font('Arial', 'B', 10)
-                pdf.cell(40, 6, 'Risk:', 0, 0)
-                pdf.set_font('Arial', '', 10)
-                
-                risk_text = sanitize_text(line.replace('Risk:', '').strip())
-                if 'Low' in risk_text:
-                    pdf.set_text_color(0, 128, 0)
-                elif 'Medium' in risk_text:
-                    pdf.set_text_color(255, 165, 0)
-                elif 'High' in risk_text:
-                    pdf.set_text_color(255, 0, 0)
-                
-                pdf.multi_cell(0, 6, risk_text)
-                pdf.set_text_color(0, 0, 0)
+            pdf.set_font('Helvetica', 'B', 10)
+            pdf.cell(40, 6, 'Risk:')
+            pdf.set_font('Helvetica', '', 10)
             
-            # Summary
-            elif line.startswith('Summary:'):
-                pdf.set_font('Arial', 'B', 10)
-                pdf.cell(40, 6, 'Summary:', 0, 0)
-                pdf.set_font('Arial', '', 10)
-                pdf.multi_cell(0, 6, sanitize_text(line.replace('Summary:', '').strip()))
+            risk_text = sanitize_text(line.replace('Risk:', '').strip())
+            if 'Low' in risk_text:
+                pdf.set_text_color(0, 128, 0)
+            elif 'Medium' in risk_text:
+                pdf.set_text_color(255, 165, 0)
+            elif 'High' in risk_text:
+                pdf.set_text_color(255, 0, 0)
             
-            else:
-                pdf.set_font('Arial', '', 10)
-                pdf.multi_cell(0, 6, sanitize_text(line))
+            pdf.multi_cell(0, 6, risk_text, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf.set_text_color(0, 0, 0)
         
-        # Generate PDF bytes
-        buffer = BytesIO()
-        pdf_output = pdf.output(dest='S').encode('latin-1')
-        buffer.write(pdf_output)
-        buffer.seek(0)
+        def write_summary(line):
+            pdf.set_font('Helvetica', 'B', 10)
+            pdf.cell(40, 6, 'Summary:')
+            pdf.set_font('Helvetica', '', 10)
+            pdf.multi_cell(0, 6, sanitize_text(line.replace('Summary:', '').strip()), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        
+        def write_text(line):
+            pdf.set_font('Helvetica', '', 10)
+            pdf.multi_cell(0, 6, sanitize_text(line), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        
+        handlers = {
+            'header': write_header,
+            'field': write_field,
+            'risk': write_risk,
+            'summary': write_summary,
+            'text': write_text,
+        }
+        
+        # Parse and format the analysis: classify each line once and dispatch
+        for line in analysis_text.splitlines():
+            line = line.strip()
+            
+            if not line or line.startswith('---'):
+                pdf.ln(3)
+                continue
+            
+            handlers[_classify_line(line, loose_fields=True)](line)
+        
+        # Generate PDF bytes (fpdf2 builds the document directly as a bytearray)
+        pdf_output = pdf.output()
+        
+        if sink is not None:
+            sink.write(pdf_output)
+            return None
         
-        return buffer.getvalue()
+        return bytes(pdf_output)
         
     except ImportError:
-        raise Exception("fpdf library not installed. Run: pip install fpdf")
+        raise Exception("fpdf2 library not installed. Run: pip install fpdf2")
     except Exception as e:
         raise Exception(f"Error generating PDF: {str(e)}")
\ No newline at end of file
@@ -3,35 +3,39 @@ Positions View - Mirrors Tastytrade's positions table
 Shows all positions (stocks, options, CSPs, CCs) in a comprehensive table
 """
 
-import streamlit as st
-import pandas as pd
 from datetime import datetime
+from functools import lru_cache
+import io
 import re
 
+# streamlit / pandas / numpy are imported inside the functions that use them, so
+# parse_option_symbol and calculate_dte can be imported without loading them
 
+# OCC option symbol: underlying, YYMMDD expiration, C/P, strike * 1000
+_OCC_RE = re.compile(r'([A-Z]+)(\d{6})([CP])(\d+)')
+
+# Position types in display order
+_POSITION_TYPES = ['Stock', 'CSP', 'CC', 'PUT', 'CALL']
+
+
+@lru_cache(maxsize=4096)
 def parse_option_symbol(symbol: str) -> dict:
-    """Parse OCC option symbol to extract components"""
-    try:
-        clean_symbol = symbol.replace(' ', '')
-        match = re.match(r'([A-Z]+)(\d{6})([CP])(\d+)', clean_symbol)
-        if match:
-            underlying = match.group(1)
-            date_str = match.group(2)
-            option_type = 'CALL' if match.group(3) == 'C' else 'PUT'
-            strike = int(match.group(4)) / 1000
-            year = 2000 + int(date_str[:2])
-            month = int(date_str[2:4])
-            day = int(date_str[4:6])
-            expiration = f"{year}-{month:02d}-{day:02d}"
-            return {
-                'underlying': underlying,
-                'expiration': expiration,
-                'option_type': option_type,
-                'strike': strike
-            }
-    except Exception:
-        pass
-    return None
+    """
+    Parse OCC option symbol to extract components
+    
+    Results are memoized per symbol and the same dict is handed to every
+    caller, so treat it as read-only (copy it before modifying).
+    """
+    match = _OCC_RE.match(symbol.replace(' ', ''))
+    if not match:
+        return None
+    underlying, date_str, option_type, strike = match.groups()
+    return {
+        'underlying': underlying,
+        'expiration': f"20{date_str[:2]}-{date_str[2:4]}-{date_str[4:6]}",
+        'option_type': 'CALL' if option_type == 'C' else 'PUT',
+        'strike': int(strike) / 1000
+    }
 
 
 def calculate_dte(expiration_str: str) -> int:
@@ -43,11 +47,145 @@ def calculate_dte(expiration_str: str) -> int:
         return 0
 
 
+def _days_to_expiration(expirations: 'pd.Series') -> 'pd.Series':
+    """Vectorized calculate_dte over a column of YYYY-MM-DD strings (invalid dates -> 0)"""
+    import pandas as pd
+    exp_dates = pd.to_datetime(expirations, format='%Y-%m-%d', errors='coerce')
+    return (exp_dates - pd.Timestamp.now()).dt.days.fillna(0).astype(int)
+
+
+def _numeric_column(raw: 'pd.DataFrame', name: str, default: float) -> 'pd.Series':
+    """Numeric field of the raw positions frame (missing field / value -> default)"""
+    import pandas as pd
+    if name not in raw:
+        return pd.Series(default, index=raw.index, dtype=float)
+    return pd.to_numeric(raw[name], errors='coerce').fillna(default)
+
+
+def _text_column(raw: 'pd.DataFrame', name: str) -> 'pd.Series':
+    """String field of the raw positions frame (missing field / value -> '')"""
+    import pandas as pd
+    if name not in raw:
+        return pd.Series('', index=raw.index, dtype=object)
+    return raw[name].fillna('').astype(str)
+
+
+def _build_positions_df(account_id, positions):
+    """
+    Build the unformatted positions table from raw Tastytrade positions
+    
+    Args:
+        account_id: Account the positions belong to (part of the cache key)
+        positions: Raw position dicts from api.get_positions
+    
+    Returns:
+        DataFrame sorted by Type and Symbol (empty if nothing displayable)
+    """
+    import numpy as np
+    import pandas as pd
+    
+    # Process positions column-wise (one pass per field over all positions)
+    raw = pd.DataFrame(positions)
+    instrument_type = _text_column(raw, 'instrument-type')
+    symbol = _text_column(raw, 'symbol')
+    quantity = _numeric_column(raw, 'quantity', 0)
+    quantity_direction = _text_column(raw, 'quantity-direction').str.lower()
+    
+    # Determine if short
+    is_short = (quantity_direction == 'short').where(quantity_direction != '', quantity < 0).astype(bool)
+    
+    # Common fields
+    avg_price = _numeric_column(raw, 'average-open-price', 0)
+    mark = _numeric_column(raw, 'mark', 0)
+    mark_price = _numeric_column(raw, 'mark-price', 0)
+    current_price = mark.where(mark != 0, mark_price)
+    
+    # Stock positions
+    stocks = instrument_type == 'Equity'
+    stock_qty = quantity[stocks].astype(int)
+    stock_cost_basis = avg_price[stocks] * stock_qty.abs()
+    stock_market_value = current_price[stocks] * stock_qty.abs()
+    stock_pl = stock_market_value - stock_cost_basis
+    stock_df = pd.DataFrame({
+        'Type': 'Stock',
+        'Symbol': symbol[stocks],
+        'Qty': stock_qty,
+        'Avg Price': avg_price[stocks],
+        'Current': current_price[stocks],
+        'Cost Basis': stock_cost_basis,
+        'Market Value': stock_market_value,
+        'P/L': stock_pl,
+        'P/L %': (stock_pl / stock_cost_basis * 100).where(stock_cost_basis != 0, 0),
+        'Strike': np.nan,
+        'Exp': None,
+        'DTE': np.nan,
+        'Option Type': None,
+        'Direction': stock_qty.gt(0).map({True: 'Long', False: 'Short'})
+    })
+    
+    # Option positions - parse every OCC symbol in one vectorized extract, skip unparseable ones
+    options = instrument_type == 'Equity Option'
+    parsed = symbol[options].str.replace(' ', '', regex=False).str.extract('^' + _OCC_RE.pattern).dropna()
+    parsed.columns = ['underlying', 'date', 'option_type', 'strike']
+    opt = parsed.index
+    opt_short = is_short[opt]
+    multiplier = _numeric_column(raw, 'multiplier', 100)[opt].astype(int)
+    opt_qty = quantity[opt].abs().astype(int)
+    option_type = parsed['option_type'].map({'C': 'CALL', 'P': 'PUT'})
+    expiration = '20' + parsed['date'].str[:2] + '-' + parsed['date'].str[2:4] + '-' + parsed['date'].str[4:6]
+    
+    # For short options (sold), avg_price is premium received (positive)
+    # For long options (bought), avg_price is premium paid (positive)
+    # Current price is what it would cost to close (short) / current value (long)
+    opt_cost_basis = avg_price[opt] * opt_qty * multiplier
+    opt_market_value = current_price[opt] * opt_qty * multiplier
+    opt_pl = (opt_cost_basis - opt_market_value).where(opt_short, opt_market_value - opt_cost_basis)
+    
+    option_df = pd.DataFrame({
+        # Determine strategy: short puts are CSPs, short calls are CCs
+        'Type': option_type.where(~opt_short, option_type.map({'PUT': 'CSP', 'CALL': 'CC'})),
+        'Symbol': parsed['underlying'],
+        'Qty': opt_qty.where(~opt_short, -opt_qty),
+        'Avg Price': avg_price[opt],
+        'Current': current_price[opt],
+        'Cost Basis': opt_cost_basis,
+        'Market Value': opt_market_value,
+        'P/L': opt_pl,
+        'P/L %': (opt_pl / opt_cost_basis * 100).where(opt_cost_basis != 0, 0),
+        'Strike': parsed['strike'].astype(int) / 1000,
+        'Exp': expiration,
+        'DTE': _days_to_expiration(expiration),
+        'Option Type': option_type,
+        'Direction': opt_short.map({True: 'Short', False: 'Long'})
+    })
+    
+    position_frames = [frame for frame in (stock_df, option_df) if len(frame) > 0]
+    if not position_frames:
+        return pd.DataFrame()
+    
+    # Create DataFrame
+    df = pd.concat(position_frames)
+    
+    # Sort by Type (Stock, CSP, CC, etc.) - an ordered categorical sorts on its codes
+    df['Type'] = df['Type'].astype(pd.CategoricalDtype(_POSITION_TYPES, ordered=True))
+    df = df.sort_values(['Type', 'Symbol'])
+    
+    return df
+
+
+@lru_cache(maxsize=None)
+def _cached_positions_builder():
+    """_build_positions_df wrapped in st.cache_data (created on first render)"""
+    import streamlit as st
+    return st.cache_data(ttl=30, show_spinner=False)(_build_positions_df)
+
+
 def render_positions_view(api, selected_account):
     """
     Render comprehensive positions view mirroring Tastytrade
     Shows all positions: stocks, options, CSPs, CCs
     """
+    import streamlit as st
     
     st.header("📊 All Positions")
     
@@ -65,116 +203,12 @@ def render_positions_view(api, selected_account):
         st.info("No positions found")
         return
     
-    # Process positions
-    position_data = []
-    
-    for pos in positions:
-        instrument_type = pos.get('instrument-type', '')
-        symbol = pos.get('symbol', '')
-        quantity = float(pos.get('quantity', 0))
-        quantity_direction = pos.get('quantity-direction', '')
-        
-        # Determine if short
-        is_short = quantity_direction.lower() == 'short' if quantity_direction else quantity < 0
-        
-        # Common fields
-        avg_price = float(pos.get('average-open-price', 0))
-        mark = float(pos.get('mark', 0))
-        mark_price = float(pos.get('mark-price', 0))
-        current_price = mark if mark != 0 else mark_price
-        
-        if instrument_type == 'Equity':
-            # Stock position
-            qty = int(quantity)
-            cost_basis = avg_price * abs(qty)
-            market_value = current_price * abs(qty)
-            pl = market_value - cost_basis
-            pl_pct = (pl / cost_basis * 100) if cost_basis != 0 else 0
-            
-            position_data.append({
-                'Type': 'Stock',
-                'Symbol': symbol,
-                'Qty': qty,
-                'Avg Price': avg_price,
-                'Current': current_price,
-                'Cost Basis': cost_basis,
-                'Market Value': market_value,
-                'P/L': pl,
-                'P/L %': pl_pct,
-                'Strike': None,
-                'Exp': None,
-                'DTE': None,
-                'Option Type': None,
-                'Direction': 'Long' if qty > 0 else 'Short'
-            })
-        
-        elif instrument_type == 'Equity Option':
-            # Option position
-            parsed = parse_option_symbol(symbol)
-            if not parsed:
-                continue
-            
-            multiplier = int(float(pos.get('multiplier', 100)))
-            qty = int(abs(quantity))
-            
-            # For short options (sold), avg_price is premium received (positive)
-            # For long options (bought), avg_price is premium paid (positive)
-            # Current price is what it would cost to close
-            
-            if is_short:
-                # Short option (sold): we received premium
-                premium_received = avg_price * qty * multiplier
-                cost_to_close = current_price * qty * multiplier
-                pl = premium_received - cost_to_close
-                pl_pct = (pl / premium_received * 100) if premium_received != 0 else 0
-                direction = 'Short'
-            else:
-                # Long option (bought): we paid premium
-                premium_paid = avg_price * qty * multiplier
-                current_value = current_price * qty * multiplier
-                pl = current_value - premium_paid
-                pl_pct = (pl / premium_paid * 100) if premium_paid != 0 else 0
-                direction = 'Long'
-            
-            dte = calculate_dte(parsed['expiration'])
-            
-            # Determine strategy
-            if is_short and parsed['option_type'] == 'PUT':
-                strategy = 'CSP'
-            elif is_short and parsed['option_type'] == 'CALL':
-                strategy = 'CC'
-            else:
-                strategy = parsed['option_type']
-            
-            position_data.append({
-                'Type': strategy,
-                'Symbol': parsed['underlying'],
-                'Qty': qty if not is_short else -qty,
-                'Avg Price': avg_price,
-                'Current': current_price,
-                'Cost Basis': premium_received if is_short else premium_paid,
-                'Market Value': cost_to_close if is_short else current_value,
-                'P/L': pl,
-                'P/L %': pl_pct,
-                'Strike': parsed['strike'],
-                'Exp': parsed['expiration'],
-                'DTE': dte,
-                'Option Type': parsed['option_type'],
-                'Direction': direction
-            })
-    
-    if not position_data:
+    # Parse and derive all columns (cached, so filter changes don't redo this)
+    df = _cached_positions_builder()(selected_account, positions)
+    if df.empty:
         st.info("No positions to display")
         return
     
-    # Create DataFrame
-    df = pd.DataFrame(position_data)
-    
-    # Sort by Type (Stock, CSP, CC, etc.)
-    type_order = {'Stock': 1, 'CSP': 2, 'CC': 3, 'PUT': 4, 'CALL': 5}
-    df['sort_order'] = df['Type'].map(type_order)
-    df = df.sort_values(['sort_order', 'Symbol']).drop('sort_order', axis=1)
-    
     # Summary metrics
     total_positions = len(df)
     stock_positions = len(df[df['Type'] == 'Stock'])
@@ -204,8 +238,8 @@ def render_positions_view(api, selected_account):
         with col1:
             filter_type = st.multiselect(
                 "Position Type",
-                options=['Stock', 'CSP', 'CC', 'PUT', 'CALL'],
-                default=['Stock', 'CSP', 'CC', 'PUT', 'CALL']
+                options=_POSITION_TYPES,
+                default=_POSITION_TYPES
             )
         with col2:
             filter_direction = st.multiselect(
@@ -222,25 +256,18 @@ def render_positions_view(api, selected_account):
     if not show_expired:
         filtered_df = filtered_df[(filtered_df['DTE'].isna()) | (filtered_df['DTE'] >= 0)]
     
-    # Format display DataFrame
-    display_df = filtered_df.copy()
-    
-    # Format columns
-    display_df['Avg Price'] = display_df['Avg Price'].apply(lambda x: f"${x:.2f}")
-    display_df['Current'] = display_df['Current'].apply(lambda x: f"${x:.2f}")
-    display_df['Cost Basis'] = display_df['Cost Basis'].apply(lambda x: f"${x:,.2f}")
-    display_df['Market Value'] = display_df['Market Value'].apply(lambda x: f"${x:,.2f}")
-    display_df['P/L'] = display_df['P/L'].apply(lambda x: f"${x:,.2f}")
-    display_df['P/L %'] = display_df['P/L %'].apply(lambda x: f"{x:+.1f}%")
-    
-    # Format Strike and DTE
-    display_df['Strike'] = display_df['Strike'].apply(lambda x: f"${x:.2f}" if pd.notna(x) else "—")
-    display_df['DTE'] = display_df['DTE'].apply(lambda x: f"{int(x)}d" if pd.notna(x) else "—")
-    display_df['Exp'] = display_df['Exp'].apply(lambda x: x if pd.notna(x) else "—")
-    
     # Select columns to display
     display_columns = ['Type', 'Symbol', 'Qty', 'Strike', 'Exp', 'DTE', 'Avg Price', 'Current', 'P/L', 'P/L %', 'Direction']
-    display_df = display_df[display_columns]
+    
+    # Format at render time via a Styler (no formatted copy of the frame; NaN/None -> "—")
+    display_df = filtered_df[display_columns].style.format({
+        'Avg Price': '${:.2f}',
+        'Current': '${:.2f}',
+        'P/L': '${:,.2f}',
+        'P/L %': '{:+.1f}%',
+        'Strike': '${:.2f}',
+        'DTE': lambda x: f"{int(x)}d"
+    }, na_rep="—")
     
     # Display table
     st.dataframe(
@@ -252,10 +279,12 @@ def render_positions_view(api, selected_account):
     
     # Export button
     st.write("")
-    csv = filtered_df.to_csv(index=False)
+    # Write the CSV straight into a bytes buffer (no intermediate str to re-encode)
+    csv_buffer = io.BytesIO()
+    filtered_df.to_csv(csv_buffer, index=False, encoding='utf-8')
     st.download_button(
         label="📥 Export to CSV",
-        data=csv,
+        data=csv_buffer.getvalue(),
         file_name=f"positions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         mime="text/csv",
         use_container_width=False
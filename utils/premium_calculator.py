@@ -3,11 +3,30 @@ Premium Calculator - Order-based calculation with roll detection
 Correctly handles multi-leg orders and roll transactions
 """
 
-from collections import defaultdict
-from datetime import datetime
+from typing import List, NamedTuple
 
+import pandas as pd
 
-def calculate_premium_from_transactions(transactions):
+
+# Transaction fields the calculation reads
+_TXN_FIELDS = ['executed-at', 'underlying-symbol', 'value', 'value-effect', 'description', 'action']
+
+
+class Order(NamedTuple):
+    """One order (all legs sharing an executed-at timestamp), as returned with detail='full'"""
+    timestamp: str
+    underlying: str
+    credits: float
+    debits: float
+    net: float
+    is_put: bool
+    is_call: bool
+    is_multi_leg: bool
+    legs: int
+    transactions: List[dict]  # Raw Tastytrade transactions of the order
+
+
+def calculate_premium_from_transactions(transactions, detail='aggregate'):
     """
     Calculate premium from API transactions using order-based grouping.
     
@@ -16,6 +35,8 @@ def calculate_premium_from_transactions(transactions):
     
     Args:
         transactions: List of transaction dicts from Tastytrade API
+        detail: 'aggregate' (totals only) or 'full' (also the per-order lists
+            of Order records, each carrying its raw transactions)
         
     Returns:
         dict with premium breakdown and statistics
@@ -23,144 +44,119 @@ def calculate_premium_from_transactions(transactions):
     
     # Filter option transactions only
     option_txns = [t for t in transactions if t.get('instrument-type') == 'Equity Option']
-    
-    # Group transactions by executed-at timestamp (same order)
-    by_timestamp = defaultdict(list)
-    for t in option_txns:
-        timestamp = t.get('executed-at', '')
-        by_timestamp[timestamp].append(t)
-    
-    # Calculate premium by ORDER (not by transaction)
-    orders = []
-    total_credits = 0
-    total_debits = 0
-    zero_value_count = 0
-    
-    csp_orders = []
-    cc_orders = []
-    
-    for timestamp, txn_list in by_timestamp.items():
-        # Calculate net value for this order
-        order_net = 0
-        order_credits = 0
-        order_debits = 0
-        has_non_zero = False
-        
-        for t in txn_list:
-            value = float(t.get('value', 0) or 0)
-            effect = t.get('value-effect', '')
-            
-            if value > 0:
-                has_non_zero = True
-                
-            if effect == 'Credit':
-                order_credits += value
-                order_net += value
-            elif effect == 'Debit':
-                order_debits += value
-                order_net -= value
-        
-        # Skip orders with all $0 values (expirations, assignments)
-        if not has_non_zero:
-            zero_value_count += len(txn_list)
-            continue
-        
-        total_credits += order_credits
-        total_debits += order_debits
-        
-        # Determine if CSP or CC
-        has_put = any('Put' in t.get('description', '') for t in txn_list)
-        has_call = any('Call' in t.get('description', '') for t in txn_list)
-        
-        # Get underlying symbol
-        underlying = txn_list[0].get('underlying-symbol', '')
-        
-        order_data = {
-            'timestamp': timestamp,
-            'underlying': underlying,
-            'transactions': txn_list,
-            'credits': order_credits,
-            'debits': order_debits,
-            'net': order_net,
-            'is_put': has_put,
-            'is_call': has_call,
-            'is_multi_leg': len(txn_list) > 1
-        }
-        
-        orders.append(order_data)
-        
-        # Categorize by type
-        if has_put and not has_call:
-            csp_orders.append(order_data)
-        elif has_call and not has_put:
-            cc_orders.append(order_data)
-        else:
-            # Mixed - assign to dominant
-            put_count = sum(1 for t in txn_list if 'Put' in t.get('description', ''))
-            call_count = sum(1 for t in txn_list if 'Call' in t.get('description', ''))
-            if put_count > call_count:
-                csp_orders.append(order_data)
-            else:
-                cc_orders.append(order_data)
-    
-    # Calculate CSP and CC totals
-    csp_net = sum(o['net'] for o in csp_orders)
-    cc_net = sum(o['net'] for o in cc_orders)
-    
-    csp_credits = sum(o['credits'] for o in csp_orders)
-    csp_debits = sum(o['debits'] for o in csp_orders)
-    cc_credits = sum(o['credits'] for o in cc_orders)
-    cc_debits = sum(o['debits'] for o in cc_orders)
-    
-    # Calculate per-symbol breakdown
-    csp_by_symbol = defaultdict(float)
-    cc_by_symbol = defaultdict(float)
-    
-    for order in csp_orders:
-        symbol = order['underlying']
-        csp_by_symbol[symbol] += order['net']
-    
-    for order in cc_orders:
-        symbol = order['underlying']
-        cc_by_symbol[symbol] += order['net']
+    raw = pd.DataFrame.from_records(option_txns, columns=_TXN_FIELDS)
+    
+    # One row per leg: signed value split into credit/debit, Put/Call and roll flags
+    value = pd.to_numeric(raw['value'], errors='coerce').fillna(0)
+    effect = raw['value-effect']
+    description = raw['description'].fillna('').astype(str)
+    legs = pd.DataFrame({
+        'timestamp': raw['executed-at'].fillna(''),
+        'underlying': raw['underlying-symbol'].fillna(''),
+        'credit': value.where(effect == 'Credit', 0.0),
+        'debit': value.where(effect == 'Debit', 0.0),
+        'non_zero': value > 0,
+        'is_put': description.str.contains('Put', regex=False),
+        'is_call': description.str.contains('Call', regex=False),
+        'is_btc': raw['action'] == 'Buy to Close',
+        'is_sto': raw['action'] == 'Sell to Open',
+    })
+    
+    # Calculate premium by ORDER (not by transaction): legs of one order share executed-at
+    by_timestamp = legs.groupby('timestamp', sort=True)
+    orders = by_timestamp.agg(
+        underlying=('underlying', 'first'),
+        credits=('credit', 'sum'),
+        debits=('debit', 'sum'),
+        has_non_zero=('non_zero', 'any'),
+        put_count=('is_put', 'sum'),
+        call_count=('is_call', 'sum'),
+        has_btc=('is_btc', 'any'),
+        has_sto=('is_sto', 'any'),
+        legs=('credit', 'size'),
+    )
+    
+    # Skip orders with all $0 values (expirations, assignments)
+    zero_value_count = int(orders.loc[~orders['has_non_zero'], 'legs'].sum())
+    orders = orders[orders['has_non_zero']]
+    
+    net = orders['credits'] - orders['debits']
+    is_multi_leg = orders['legs'] > 1
+    # Categorize by type - mixed orders go to the dominant leg type, so this
+    # reduces to comparing the Put and Call leg counts
+    is_csp = orders['put_count'] > orders['call_count']
     
     # Count rolls (multi-leg orders with both BTC and STO)
-    roll_count = 0
-    for order in orders:
-        if order['is_multi_leg']:
-            actions = [t.get('action', '') for t in order['transactions']]
-            has_btc = 'Buy to Close' in actions
-            has_sto = 'Sell to Open' in actions
-            if has_btc and has_sto:
-                roll_count += 1
-    
-    return {
+    roll_count = int((is_multi_leg & orders['has_btc'] & orders['has_sto']).sum())
+    multi_leg_count = int(is_multi_leg.sum())
+    csp_count = int(is_csp.sum())
+    
+    # One groupby gives credits/debits/net per (CSP/CC, symbol); the CSP and CC
+    # totals are then sums over those few rows (symbols in order of first appearance)
+    strategy = is_csp.map({True: 'CSP', False: 'CC'})
+    by_symbol = orders[['credits', 'debits']].assign(net=net).groupby([strategy, orders['underlying']], sort=False).sum()
+    strategies = by_symbol.index.get_level_values(0)
+    csp_by_symbol = by_symbol.loc['CSP'] if 'CSP' in strategies else by_symbol.iloc[:0]
+    cc_by_symbol = by_symbol.loc['CC'] if 'CC' in strategies else by_symbol.iloc[:0]
+    csp_totals = csp_by_symbol.sum()
+    cc_totals = cc_by_symbol.sum()
+    
+    total_credits = float(csp_totals['credits'] + cc_totals['credits'])
+    total_debits = float(csp_totals['debits'] + cc_totals['debits'])
+    
+    result = {
         'total_gross': total_credits,
         'total_buyback': total_debits,
         'total_net': total_credits - total_debits,
         
-        'csp_gross': csp_credits,
-        'csp_buyback': csp_debits,
-        'csp_net': csp_net,
+        'csp_gross': float(csp_totals['credits']),
+        'csp_buyback': float(csp_totals['debits']),
+        'csp_net': float(csp_totals['net']),
         
-        'cc_gross': cc_credits,
-        'cc_buyback': cc_debits,
-        'cc_net': cc_net,
+        'cc_gross': float(cc_totals['credits']),
+        'cc_buyback': float(cc_totals['debits']),
+        'cc_net': float(cc_totals['net']),
         
-        'csp_by_symbol': dict(csp_by_symbol),
-        'cc_by_symbol': dict(cc_by_symbol),
+        'csp_by_symbol': {symbol: float(total) for symbol, total in csp_by_symbol['net'].items()},
+        'cc_by_symbol': {symbol: float(total) for symbol, total in cc_by_symbol['net'].items()},
         
         'total_orders': len(orders),
-        'csp_orders': len(csp_orders),
-        'cc_orders': len(cc_orders),
+        'csp_orders': csp_count,
+        'cc_orders': len(orders) - csp_count,
         'roll_count': roll_count,
-        'multi_leg_count': sum(1 for o in orders if o['is_multi_leg']),
-        'single_leg_count': sum(1 for o in orders if not o['is_multi_leg']),
-        
-        'orders': orders,
-        'csp_orders_list': csp_orders,
-        'cc_orders_list': cc_orders
+        'multi_leg_count': multi_leg_count,
+        'single_leg_count': len(orders) - multi_leg_count,
     }
+    
+    if detail == 'full':
+        # Per-order Order records, each carrying its raw transactions
+        leg_positions = by_timestamp.indices
+        order_list = []
+        csp_orders = []
+        cc_orders = []
+        for timestamp, row, order_net, order_is_csp, order_is_multi_leg in zip(
+            orders.index, orders.itertuples(index=False), net, is_csp, is_multi_leg
+        ):
+            order_data = Order(
+                timestamp=timestamp,
+                underlying=row.underlying,
+                credits=float(row.credits),
+                debits=float(row.debits),
+                net=float(order_net),
+                is_put=bool(row.put_count > 0),
+                is_call=bool(row.call_count > 0),
+                is_multi_leg=bool(order_is_multi_leg),
+                legs=int(row.legs),
+                transactions=[option_txns[i] for i in leg_positions[timestamp]],
+            )
+            order_list.append(order_data)
+            (csp_orders if order_is_csp else cc_orders).append(order_data)
+        
+        result['orders'] = order_list
+        result['csp_orders_list'] = csp_orders
+        result['cc_orders_list'] = cc_orders
+    
+    return result
 
 
 def format_premium_summary(premium_data):
@@ -4,60 +4,113 @@ Shows how CC premiums are reducing cost basis and path to breakeven
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 from datetime import datetime
 from typing import List, Dict
 
 
+# Stock position fields used by the recovery calculation
+_POSITION_FIELDS = ['symbol', 'quantity', 'average_open_price', 'close_price', 'mark']
+
+# Months of CC trading behind the collected premiums (Sept 18 - Jan 3)
+_HISTORICAL_MONTHS = 3.5
+
+# Underwater position fields shown in the recovery table -> table column names
+_TABLE_COLUMNS = {
+    'symbol': 'Symbol',
+    'quantity': 'Shares',
+    'cost_basis': 'Cost Basis',
+    'current_price': 'Current Price',
+    'unrealized_loss': 'Unrealized Loss',
+    'cc_premium': 'CC Premiums',
+    'adjusted_basis': 'Adjusted Basis',
+    'remaining_loss': 'Remaining Loss',
+    'recovery_pct': 'Recovery %'
+}
+
+# Recovery % cell styles: below 25%, 25-50%, 50% and up
+_RECOVERY_STYLES = [
+    'background-color: #dc3545; color: white',
+    'background-color: #ffc107; color: black',
+    'background-color: #28a745; color: white'
+]
+
+
+def _recovery_kernel(qty, avg_cost, current_price, cc_premium):
+    """
+    Per-position recovery arithmetic over NumPy arrays of equal length
+    
+    Returns (cost_basis, market_value, unrealized_pl, recovery_pct,
+    adjusted_basis, remaining_loss); recovery_pct and adjusted_basis are only
+    computed for underwater positions (elsewhere they are 0 and avg_cost).
+    """
+    # recovery_pct and adjusted_basis are filled in place (out=/where=) so the
+    # divisions only run for underwater positions; the other columns are plain
+    # array expressions
+    cost_basis = qty * avg_cost
+    market_value = qty * current_price
+    unrealized_pl = market_value - cost_basis
+    underwater = unrealized_pl < 0
+    
+    # Share of the loss recovered by CC premiums
+    recovery_pct = np.zeros_like(unrealized_pl)
+    np.divide(cc_premium, unrealized_pl, out=recovery_pct, where=underwater)
+    recovery_pct *= -100
+    
+    # Adjusted cost basis after CC premiums (only meaningful for underwater positions)
+    adjusted_basis = np.zeros_like(avg_cost)
+    np.divide(cc_premium, qty, out=adjusted_basis, where=underwater)
+    np.subtract(avg_cost, adjusted_basis, out=adjusted_basis)
+    
+    # Gap to close (remaining loss after CC premiums)
+    remaining_loss = np.add(unrealized_pl, cc_premium)
+    
+    return cost_basis, market_value, unrealized_pl, recovery_pct, adjusted_basis, remaining_loss
+
+
+@st.cache_data(ttl=60, show_spinner=False)
 def calculate_recovery_metrics(stock_positions: List[Dict], cc_premiums: Dict) -> Dict:
     """
     Calculate recovery metrics for underwater positions
     Returns summary stats and position-level recovery data
+    
+    Cached on the positions/premiums content, so widget reruns of the tracker
+    (e.g. the target premium input) don't recompute it.
     """
-    underwater_positions = []
-    total_unrealized_loss = 0
-    total_cc_premium_collected = 0
-    
-    for pos in stock_positions:
-        symbol = pos['symbol']
-        qty = pos['quantity']
-        avg_cost = pos['average_open_price']
-        current_price = pos.get('close_price', 0) or pos.get('mark', 0)
-        
-        cost_basis = qty * avg_cost
-        market_value = qty * current_price
-        unrealized_pl = market_value - cost_basis
-        
-        # Only track underwater positions (negative P/L)
-        if unrealized_pl < 0:
-            cc_premium = cc_premiums.get(symbol, 0)
-            total_cc_premium_collected += cc_premium
-            
-            # Calculate recovery percentage
-            recovery_pct = (cc_premium / abs(unrealized_pl) * 100) if unrealized_pl != 0 else 0
-            
-            # Adjusted cost basis after CC premiums
-            adjusted_basis = avg_cost - (cc_premium / qty)
-            
-            # Gap to close (remaining loss after CC premiums)
-            remaining_loss = unrealized_pl + cc_premium
-            
-            underwater_positions.append({
-                'symbol': symbol,
-                'quantity': qty,
-                'cost_basis': avg_cost,
-                'current_price': current_price,
-                'total_cost': cost_basis,
-                'market_value': market_value,
-                'unrealized_loss': unrealized_pl,
-                'cc_premium': cc_premium,
-                'recovery_pct': recovery_pct,
-                'adjusted_basis': adjusted_basis,
-                'remaining_loss': remaining_loss
-            })
-            
-            total_unrealized_loss += unrealized_pl
+    # Extract the position columns once and run the arithmetic over whole arrays
+    positions = pd.DataFrame(stock_positions, columns=_POSITION_FIELDS)
+    qty = positions['quantity'].to_numpy(dtype=float)
+    avg_cost = positions['average_open_price'].to_numpy(dtype=float)
+    # Close price, falling back to the mark when it's missing/zero
+    close_price = positions['close_price'].fillna(0).to_numpy(dtype=float)
+    mark = positions['mark'].fillna(0).to_numpy(dtype=float)
+    current_price = np.where(close_price != 0, close_price, mark)
+    cc_premium = positions['symbol'].map(cc_premiums).fillna(0).to_numpy(dtype=float)
+    
+    cost_basis, market_value, unrealized_pl, recovery_pct, adjusted_basis, remaining_loss = _recovery_kernel(
+        qty, avg_cost, current_price, cc_premium
+    )
+    
+    # Only track underwater positions (negative P/L)
+    underwater = unrealized_pl < 0
+    underwater_df = pd.DataFrame({
+        'symbol': positions['symbol'].to_numpy()[underwater],
+        'quantity': positions['quantity'].to_numpy()[underwater],
+        'cost_basis': avg_cost[underwater],
+        'current_price': current_price[underwater],
+        'total_cost': cost_basis[underwater],
+        'market_value': market_value[underwater],
+        'unrealized_loss': unrealized_pl[underwater],
+        'cc_premium': cc_premium[underwater],
+        'recovery_pct': recovery_pct[underwater],
+        'adjusted_basis': adjusted_basis[underwater],
+        'remaining_loss': remaining_loss[underwater]
+    })
+    
+    # Masked reductions over the full arrays (no filtered copies)
+    total_unrealized_loss = float(np.sum(unrealized_pl, where=underwater))
+    total_cc_premium_collected = float(np.sum(cc_premium, where=underwater))
     
     # Calculate overall recovery percentage
     overall_recovery_pct = (total_cc_premium_collected / abs(total_unrealized_loss) * 100) if total_unrealized_loss != 0 else 0
@@ -65,13 +118,17 @@ def calculate_recovery_metrics(stock_positions: List[Dict], cc_premiums: Dict) -
     # Net position after CC premiums
     net_position = total_unrealized_loss + total_cc_premium_collected
     
+    # Calculate historical monthly CC rate (from total CC premiums)
+    historical_monthly_rate = total_cc_premium_collected / _HISTORICAL_MONTHS
+    
     return {
         'total_unrealized_loss': total_unrealized_loss,
         'total_cc_premium': total_cc_premium_collected,
         'overall_recovery_pct': overall_recovery_pct,
         'net_position': net_position,
-        'underwater_positions': underwater_positions,
-        'num_underwater': len(underwater_positions)
+        'historical_monthly_rate': historical_monthly_rate,
+        'underwater_positions': underwater_df,
+        'num_underwater': len(underwater_df)
     }
 
 
@@ -84,6 +141,30 @@ def estimate_recovery_timeline(remaining_loss: float, monthly_cc_rate: float) ->
     return abs(remaining_loss) / monthly_cc_rate
 
 
+@st.fragment
+def _render_target_timeline(net_position: float, default_target: int):
+    """
+    Render the breakeven estimate at a user-entered target monthly CC premium
+    
+    Runs as a fragment, so editing the target only reruns this widget and not
+    the metrics, table and chart of the tracker.
+    """
+    # User can input target monthly CC premium
+    target_monthly = st.number_input(
+        "Target Monthly CC Premium",
+        min_value=0,
+        value=default_target,
+        step=1000,
+        help="Enter your target monthly CC premium collection goal"
+    )
+    
+    if target_monthly > 0:
+        target_months = estimate_recovery_timeline(net_position, target_monthly)
+        st.success(f"**{target_months:.1f} months** to breakeven at ${target_monthly:,.0f}/month")
+    else:
+        st.warning("Enter target monthly CC premium")
+
+
 def render_recovery_tracker(stock_positions: List[Dict], cc_premiums: Dict):
     """
     Render the Position Recovery Tracker
@@ -105,6 +186,24 @@ def render_recovery_tracker(stock_positions: List[Dict], cc_premiums: Dict):
     are reducing your cost basis over time.
     """)
     
+    # No CC premiums yet: the recovery columns, timeline and chart would all be
+    # zero / all loss, so just list the underwater positions
+    if metrics['total_cc_premium'] == 0:
+        st.info("No CC premiums collected yet — showing underwater positions only")
+        positions_df = metrics['underwater_positions'].sort_values('unrealized_loss', kind='stable')
+        st.dataframe(
+            pd.DataFrame({
+                'Symbol': positions_df['symbol'],
+                'Shares': positions_df['quantity'],
+                'Cost/Share': np.char.mod('$%.2f', positions_df['cost_basis'].to_numpy(dtype=float)),
+                'Current': np.char.mod('$%.2f', positions_df['current_price'].to_numpy(dtype=float)),
+                'Unrealized Loss': '-$' + positions_df['unrealized_loss'].abs().map('{:,.0f}'.format)
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        return
+    
     # Summary metrics
     col1, col2, col3, col4 = st.columns(4)
     
@@ -148,10 +247,7 @@ def render_recovery_tracker(stock_positions: List[Dict], cc_premiums: Dict):
     # Recovery timeline estimates
     st.subheader("⏱️ Recovery Timeline Estimates")
     
-    # Calculate historical monthly CC rate (from total CC premiums)
-    # Assuming 3.5 months of trading (Sept 18 - Jan 3)
-    historical_months = 3.5
-    historical_monthly_rate = metrics['total_cc_premium'] / historical_months
+    historical_monthly_rate = metrics['historical_monthly_rate']
     
     col1, col2 = st.columns(2)
     
@@ -165,64 +261,39 @@ def render_recovery_tracker(stock_positions: List[Dict], cc_premiums: Dict):
     
     with col2:
         st.markdown("**At Target CC Rate:**")
-        # User can input target monthly CC premium
-        target_monthly = st.number_input(
-            "Target Monthly CC Premium",
-            min_value=0,
-            value=int(historical_monthly_rate * 3),  # Default to 3x current
-            step=1000,
-            help="Enter your target monthly CC premium collection goal"
-        )
-        
-        if target_monthly > 0:
-            target_months = estimate_recovery_timeline(metrics['net_position'], target_monthly)
-            st.success(f"**{target_months:.1f} months** to breakeven at ${target_monthly:,.0f}/month")
-        else:
-            st.warning("Enter target monthly CC premium")
+        _render_target_timeline(metrics['net_position'], int(historical_monthly_rate * 3))  # Default to 3x current
     
     st.divider()
     
     # Position-by-position recovery table
     st.subheader("📋 Position-by-Position Recovery")
     
-    # Sort by remaining loss (worst first)
-    sorted_positions = sorted(metrics['underwater_positions'], key=lambda x: x['remaining_loss'])
-    
-    table_data = []
-    for pos in sorted_positions:
-        table_data.append({
-            'Symbol': pos['symbol'],
-            'Shares': pos['quantity'],
-            'Cost Basis': f"${pos['cost_basis']:.2f}",
-            'Current Price': f"${pos['current_price']:.2f}",
-            'Unrealized Loss': pos['unrealized_loss'],
-            'CC Premiums': pos['cc_premium'],
-            'Adjusted Basis': f"${pos['adjusted_basis']:.2f}",
-            'Remaining Loss': pos['remaining_loss'],
-            'Recovery %': pos['recovery_pct']
-        })
-    
-    df = pd.DataFrame(table_data)
-    
-    # Format for display
-    df_display = df.copy()
-    df_display['Unrealized Loss'] = df_display['Unrealized Loss'].apply(lambda x: f"-${abs(x):,.0f}")
-    df_display['CC Premiums'] = df_display['CC Premiums'].apply(lambda x: f"${x:,.0f}")
-    df_display['Remaining Loss'] = df_display['Remaining Loss'].apply(lambda x: f"-${abs(x):,.0f}")
-    df_display['Recovery %'] = df_display['Recovery %'].apply(lambda x: f"{x:.1f}%")
-    
-    # Color code recovery percentage
-    def color_recovery(val):
-        pct = float(val.replace('%', ''))
-        if pct >= 50:
-            return 'background-color: #28a745; color: white'
-        elif pct >= 25:
-            return 'background-color: #ffc107; color: black'
-        else:
-            return 'background-color: #dc3545; color: white'
+    # One frame of the positions sorted by remaining loss (worst first); the
+    # table and chart are projections of it
+    underwater_df = metrics['underwater_positions'].sort_values('remaining_loss', kind='stable')
+    
+    df = underwater_df[list(_TABLE_COLUMNS)].rename(columns=_TABLE_COLUMNS)
+    
+    # Format for display (a new frame of formatted columns, no full copy of df)
+    df_display = pd.DataFrame({
+        'Symbol': df['Symbol'],
+        'Shares': df['Shares'],
+        'Cost Basis': np.char.mod('$%.2f', df['Cost Basis'].to_numpy(dtype=float)),
+        'Current Price': np.char.mod('$%.2f', df['Current Price'].to_numpy(dtype=float)),
+        'Unrealized Loss': '-$' + df['Unrealized Loss'].abs().map('{:,.0f}'.format),
+        'CC Premiums': '$' + df['CC Premiums'].map('{:,.0f}'.format),
+        'Adjusted Basis': np.char.mod('$%.2f', df['Adjusted Basis'].to_numpy(dtype=float)),
+        'Remaining Loss': '-$' + df['Remaining Loss'].abs().map('{:,.0f}'.format),
+        'Recovery %': np.char.mod('%.1f%%', df['Recovery %'].to_numpy(dtype=float))
+    })
+    
+    # Color code recovery percentage: bin the numeric column once (< 25% | 25-50% | >= 50%,
+    # on the displayed 1-decimal value) and hand the Styler the precomputed CSS
+    recovery_bucket = pd.cut(df['Recovery %'].round(1), [-np.inf, 25, 50, np.inf], right=False, labels=False)
+    recovery_styles = np.asarray(_RECOVERY_STYLES)[recovery_bucket.to_numpy(dtype=np.intp)]
     
     st.dataframe(
-        df_display,
+        df_display.style.apply(lambda _: recovery_styles, subset=['Recovery %']),
         use_container_width=True,
         hide_index=True,
         column_config={
@@ -240,60 +311,61 @@ def render_recovery_tracker(stock_positions: List[Dict], cc_premiums: Dict):
     
     st.divider()
     
-    # Recovery visualization - Bar chart
+    # Recovery visualization - Bar chart (plotly is only loaded when there is a chart to draw)
+    import plotly.graph_objects as go
+    
     st.subheader("📊 Recovery Progress by Position")
     
-    chart_data = []
-    for pos in sorted_positions:
-        chart_data.append({
-            'Symbol': pos['symbol'],
-            'Unrealized Loss': abs(pos['unrealized_loss']),
-            'CC Premiums': pos['cc_premium'],
-            'Remaining Loss': abs(pos['remaining_loss'])
-        })
-    
-    chart_df = pd.DataFrame(chart_data)
-    
-    fig = go.Figure()
-    
-    # Stacked bar chart showing unrealized loss and CC premium recovery
-    fig.add_trace(go.Bar(
-        name='CC Premiums (Recovered)',
-        x=chart_df['Symbol'],
-        y=chart_df['CC Premiums'],
-        marker_color='#28a745'
-    ))
-    
-    fig.add_trace(go.Bar(
-        name='Remaining Loss',
-        x=chart_df['Symbol'],
-        y=chart_df['Remaining Loss'],
-        marker_color='#dc3545'
-    ))
-    
-    fig.update_layout(
-        barmode='stack',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(showgrid=False, color='#888', tickangle=-45),
-        yaxis=dict(
-            showgrid=True, 
-            gridcolor='rgba(255,255,255,0.1)', 
-            color='#888',
-            title='Amount ($)', 
-            tickprefix='$', 
-            tickformat=',.0f'
-        ),
-        margin=dict(l=80, r=20, t=20, b=100),
-        height=500,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
-    )
+    chart_df = underwater_df[['symbol', 'cc_premium']].rename(columns={'symbol': 'Symbol', 'cc_premium': 'CC Premiums'}).assign(**{
+        'Unrealized Loss': underwater_df['unrealized_loss'].abs(),
+        'Remaining Loss': underwater_df['remaining_loss'].abs()
+    })
+    
+    symbols = chart_df['Symbol'].tolist()
+    
+    # Stacked bar chart showing unrealized loss and CC premium recovery, built
+    # from one spec so plotly validates the figure in a single pass
+    fig = go.Figure({
+        'data': [
+            {
+                'type': 'bar',
+                'name': 'CC Premiums (Recovered)',
+                'x': symbols,
+                'y': chart_df['CC Premiums'].tolist(),
+                'marker': {'color': '#28a745'}
+            },
+            {
+                'type': 'bar',
+                'name': 'Remaining Loss',
+                'x': symbols,
+                'y': chart_df['Remaining Loss'].tolist(),
+                'marker': {'color': '#dc3545'}
+            }
+        ],
+        'layout': {
+            'barmode': 'stack',
+            'plot_bgcolor': 'rgba(0,0,0,0)',
+            'paper_bgcolor': 'rgba(0,0,0,0)',
+            'xaxis': {'showgrid': False, 'color': '#888', 'tickangle': -45},
+            'yaxis': {
+                'showgrid': True,
+                'gridcolor': 'rgba(255,255,255,0.1)',
+                'color': '#888',
+                'title': 'Amount ($)',
+                'tickprefix': '$',
+                'tickformat': ',.0f'
+            },
+            'margin': {'l': 80, 'r': 20, 't': 20, 'b': 100},
+            'height': 500,
+            'legend': {
+                'orientation': 'h',
+                'yanchor': 'bottom',
+                'y': 1.02,
+                'xanchor': 'right',
+                'x': 1
+            }
+        }
+    })
     
     st.plotly_chart(fig, use_container_width=True)
     
@@ -4,13 +4,131 @@ Fetches historical trades and converts them to our data model
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import json
 import os
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+import re
+from typing import List, Dict, Iterator, Optional, Tuple
 import uuid
+import numpy as np
+import pandas as pd
 import streamlit as st
 
-from utils.data_models import Trade, StockPosition, data_store
+from utils.data_models import Trade, StockPosition, data_store, DATA_DIR
+
+# Max concurrent transaction page requests during a history import
+TXN_FETCH_MAX_WORKERS = 8
+
+# Transaction pages of date ranges that ended more than TXN_CACHE_SETTLE_DAYS
+# ago no longer change, so they are cached on disk here (one folder per account).
+# Imports fetch settled history one calendar month at a time, so the cached
+# pages keep the same key from one day's import to the next
+TXN_CACHE_DIR = DATA_DIR / 'txn_cache'
+TXN_CACHE_SETTLE_DAYS = 7
+
+# OCC option symbol: SYMBOL + optional spaces + YYMMDD + P/C + Strike*1000 (8 digits)
+_OCC_SYMBOL_RE = re.compile(r'([A-Z0-9./]+)\s*(\d{2})(\d{2})(\d{2})([PC])(\d{8})')
+
+
+# Transaction categories that become Trade records
+_OPTION_TRADE_CATEGORIES = ['CSP_OPEN', 'CSP_CLOSE', 'CC_OPEN', 'CC_CLOSE']
+
+
+# Transaction categories that end an option trade with shares changing hands
+_ASSIGNMENT_CATEGORIES = ['ASSIGNMENT', 'EXERCISE']
+
+# Option action -> (category for puts, category for calls)
+_OPTION_ACTION_CATEGORIES = {
+    'Sell to Open': ('CSP_OPEN', 'CC_OPEN'),
+    'Buy to Close': ('CSP_CLOSE', 'CC_CLOSE'),
+    'Buy to Open': ('OTHER', 'OTHER'),  # Long options not tracked
+    'Sell to Close': ('OTHER', 'OTHER')  # Long options not tracked
+}
+
+# Stock action -> category
+_EQUITY_ACTION_CATEGORIES = {'Buy': 'STOCK_BUY', 'Sell': 'STOCK_SELL'}
+
+# Trade fields, in order, of a trades frame
+_TRADE_COLUMNS = [
+    'trade_id', 'account_id', 'symbol', 'trade_type', 'action', 'strike', 'expiration', 'quantity',
+    'premium_per_contract', 'total_premium', 'trade_date', 'status', 'close_date', 'close_price',
+    'realized_pnl', 'tastytrade_order_id'
+]
+
+# Trades frame columns identifying one option contract
+_CONTRACT_KEY = ['symbol', 'strike', 'expiration', 'trade_type']
+
+
+def _trades_from_frame(trades: pd.DataFrame) -> List[Trade]:
+    """Trade records for the rows of a trades frame (missing values -> None)"""
+    records = trades.astype(object).where(trades.notna(), None).to_dict('records')
+    return [Trade(**record) for record in records]
+
+
+def _last_settled_date() -> str:
+    """Latest date (YYYY-MM-DD) whose transactions are treated as final"""
+    return (datetime.now() - timedelta(days=TXN_CACHE_SETTLE_DAYS)).strftime('%Y-%m-%d')
+
+
+def _import_windows(start_date: str, end_date: str) -> List[Tuple[str, str]]:
+    """
+    Split an import date range into fetch windows
+    
+    Every fully settled calendar month is its own window (clipped to the range),
+    so its cache key doesn't move as the settle cutoff does; the rest of the
+    range, from the first month that isn't fully settled, is one live window.
+    
+    Returns:
+        (start, end) windows, newest first like the API's transaction order
+    """
+    settled_end = date.fromisoformat(_last_settled_date())
+    # Last day of the last fully settled month
+    cached_end = (settled_end + timedelta(days=1)).replace(day=1) - timedelta(days=1)
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    
+    windows = []
+    if end > cached_end:
+        windows.append((max(start, cached_end + timedelta(days=1)).isoformat(), end_date))
+    
+    month_end = min(end, cached_end)
+    while month_end >= start:
+        month_start = month_end.replace(day=1)
+        windows.append((max(start, month_start).isoformat(), month_end.isoformat()))
+        month_end = month_start - timedelta(days=1)
+    
+    return windows
+
+
+def _random_uuids(count: int) -> List[str]:
+    """count random (version 4) UUID strings, drawn from a single os.urandom call"""
+    rand = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=rand[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+
+
+def _txn_column(txns: pd.DataFrame, name: str, default) -> pd.Series:
+    """Field of the transactions frame (missing field / value -> default, like txn.get)"""
+    if name not in txns:
+        return pd.Series(default, index=txns.index, dtype=object)
+    return txns[name].where(txns[name].notna(), default)
+
+
+@lru_cache(maxsize=4096)
+def _parse_occ_symbol(symbol: str) -> Optional[Dict]:
+    """Parse a stripped OCC option symbol (cached - opens and closes share symbols)"""
+    match = _OCC_SYMBOL_RE.fullmatch(symbol)
+    if not match:
+        return None
+    underlying, year, month, day, option_type, strike = match.groups()
+    return {
+        'underlying': underlying,
+        'expiration': f"20{year}-{month}-{day}",
+        'option_type': option_type,
+        'strike': int(strike) / 1000
+    }
 
 
 class TradeHistoryImporter:
@@ -26,6 +144,12 @@ class TradeHistoryImporter:
         self.api = api
         self.base_url = api.base_url
         self.session_token = api.session_token
+        
+        # One keep-alive session for all page requests, with a connection
+        # pool large enough for the concurrent page fetches
+        self.session = requests.Session()
+        self.session.headers.update({'Authorization': self.session_token})
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=TXN_FETCH_MAX_WORKERS))
     
     def fetch_transactions(self, account_id: str, start_date: str, end_date: str, 
                           page: int = 0, per_page: int = 250) -> Dict:
@@ -40,10 +164,19 @@ class TradeHistoryImporter:
             per_page: Results per page (max 250)
         
         Returns:
-            API response dict
+            API response dict (pages of settled date ranges are cached in TXN_CACHE_DIR)
         """
+        # Settled ranges are served from (and saved to) the disk cache
+        cache_file = None
+        if end_date <= _last_settled_date():
+            cache_file = TXN_CACHE_DIR / account_id / f'{start_date}_{end_date}_{per_page}_{page}.json'
+            try:
+                with open(cache_file, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass  # Not cached yet (or unreadable) - fetch it
+        
         url = f'{self.base_url}/accounts/{account_id}/transactions'
-        headers = {'Authorization': self.session_token}
         params = {
             'start-date': start_date,
             'end-date': end_date,
@@ -52,9 +185,12 @@ class TradeHistoryImporter:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self.session.get(url, params=params, timeout=30)
             if response.status_code == 200:
-                return response.json()
+                data = response.json()
+                if cache_file is not None:
+                    self._cache_page(cache_file, data)
+                return data
             else:
                 print(f"Error fetching transactions: {response.status_code}")
                 return {'data': {'items': []}}
@@ -62,6 +198,80 @@ class TradeHistoryImporter:
             print(f"Exception fetching transactions: {str(e)}")
             return {'data': {'items': []}}
     
+    def _cache_page(self, cache_file, data: Dict):
+        """Save a fetched page to the disk cache (best effort - a failed write only costs a refetch)"""
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so a cached page is never partial
+            tmp_file = cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"Could not cache transactions page: {str(e)}")
+    
+    def _prune_page_cache(self, account_id: str, windows: List[Tuple[str, str]]):
+        """Delete the account's cached pages that none of the given fetch windows uses"""
+        in_use = {f'{window_start}_{window_end}' for window_start, window_end in windows}
+        for cache_file in (TXN_CACHE_DIR / account_id).glob('*_*_*_*.*'):
+            # File names are {start}_{end}_{per_page}_{page}.json (or .tmp)
+            if cache_file.name.rsplit('_', 2)[0] not in in_use:
+                try:
+                    cache_file.unlink()
+                except OSError as e:
+                    print(f"Could not prune transactions page cache: {str(e)}")
+    
+    def iter_transaction_pages(self, account_id: str, start_date: str, end_date: str,
+                               progress_callback=None) -> Iterator[List[Dict]]:
+        """
+        Fetch all transactions with pagination, yielding one page of items at a time
+        
+        Args:
+            account_id: Tastytrade account ID
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            progress_callback: Optional callback for progress updates
+        
+        Yields:
+            Lists of transaction dicts, in page order
+        """
+        fetched = 0
+        next_page = 0
+        batch_size = 1  # Probe with the first page alone - most imports fit in one page
+        
+        def fetch_page(page):
+            return self.fetch_transactions(account_id, start_date, end_date, page)
+        
+        # Fetch the remaining pages TXN_FETCH_MAX_WORKERS at a time, consuming
+        # them in page order until the first empty or partial page
+        with ThreadPoolExecutor(max_workers=TXN_FETCH_MAX_WORKERS) as executor:
+            while True:
+                last_page = False
+                
+                for response in executor.map(fetch_page, range(next_page, next_page + batch_size)):
+                    items = response.get('data', {}).get('items', [])
+                    
+                    if not items:
+                        last_page = True
+                        break
+                    
+                    fetched += len(items)
+                    yield items
+                    
+                    if progress_callback:
+                        progress_callback(f"Fetched {fetched} transactions...")
+                    
+                    # Check if we got less than a full page (last page)
+                    if len(items) < 250:
+                        last_page = True
+                        break
+                
+                if last_page:
+                    break
+                
+                next_page += batch_size
+                batch_size = TXN_FETCH_MAX_WORKERS
+    
     def fetch_all_transactions(self, account_id: str, start_date: str, end_date: str,
                                progress_callback=None) -> List[Dict]:
         """
@@ -76,28 +286,8 @@ class TradeHistoryImporter:
         Returns:
             List of all transaction dicts
         """
-        all_transactions = []
-        page = 0
-        
-        while True:
-            response = self.fetch_transactions(account_id, start_date, end_date, page)
-            items = response.get('data', {}).get('items', [])
-            
-            if not items:
-                break
-            
-            all_transactions.extend(items)
-            
-            if progress_callback:
-                progress_callback(f"Fetched {len(all_transactions)} transactions...")
-            
-            # Check if we got less than a full page (last page)
-            if len(items) < 250:
-                break
-            
-            page += 1
-        
-        return all_transactions
+        return [txn for page in self.iter_transaction_pages(account_id, start_date, end_date, progress_callback)
+                for txn in page]
     
     def categorize_transaction(self, txn: Dict) -> str:
         """
@@ -120,16 +310,9 @@ class TradeHistoryImporter:
         
         # Handle options
         if instrument_type == 'Equity Option':
-            option_type = txn.get('option-type', '')
-            
-            if action == 'Sell to Open':
-                return 'CSP_OPEN' if option_type == 'P' else 'CC_OPEN'
-            elif action == 'Buy to Close':
-                return 'CSP_CLOSE' if option_type == 'P' else 'CC_CLOSE'
-            elif action == 'Buy to Open':
-                return 'OTHER'  # Long options not tracked
-            elif action == 'Sell to Close':
-                return 'OTHER'  # Long options not tracked
+            categories = _OPTION_ACTION_CATEGORIES.get(action)
+            if categories:
+                return categories[txn.get('option-type', '') != 'P']
         
         # Handle assignments and exercises
         if 'Assignment' in description or 'Assigned' in description:
@@ -139,10 +322,7 @@ class TradeHistoryImporter:
         
         # Handle stock transactions
         if instrument_type == 'Equity':
-            if action == 'Buy':
-                return 'STOCK_BUY'
-            elif action == 'Sell':
-                return 'STOCK_SELL'
+            return _EQUITY_ACTION_CATEGORIES.get(action, 'OTHER')
         
         return 'OTHER'
     
@@ -155,51 +335,13 @@ class TradeHistoryImporter:
         - Expiration: 2025-08-22
         - Type: P (Put)
         - Strike: 200.00
-        """
-        try:
-            # Remove spaces and get base symbol
-            symbol = symbol.strip()
-            
-            # Find where the date starts (6 digits after underlying)
-            # Format: SYMBOL + spaces + YYMMDD + P/C + Strike*1000
-            parts = symbol.split()
-            if len(parts) >= 2:
-                underlying = parts[0]
-                rest = parts[1] if len(parts) > 1 else parts[0][len(underlying):]
-            else:
-                # Try to find the date pattern
-                underlying = ''
-                rest = symbol
-                for i, char in enumerate(symbol):
-                    if char.isdigit():
-                        underlying = symbol[:i].strip()
-                        rest = symbol[i:]
-                        break
-            
-            if len(rest) >= 15:
-                date_str = rest[:6]
-                option_type = rest[6]
-                strike_str = rest[7:]
-                
-                # Parse date (YYMMDD)
-                year = 2000 + int(date_str[:2])
-                month = int(date_str[2:4])
-                day = int(date_str[4:6])
-                expiration = f"{year}-{month:02d}-{day:02d}"
-                
-                # Parse strike (remove leading zeros, divide by 1000)
-                strike = float(strike_str) / 1000
-                
-                return {
-                    'underlying': underlying,
-                    'expiration': expiration,
-                    'option_type': option_type,
-                    'strike': strike
-                }
-        except Exception as e:
-            print(f"Error parsing option symbol {symbol}: {e}")
         
-        return None
+        Results are memoized per symbol and shared between callers, so treat
+        the returned dict as read-only.
+        """
+        if not symbol:
+            return None
+        return _parse_occ_symbol(symbol.strip())
     
     def build_trade_from_transaction(self, txn: Dict, category: str, account_id: str) -> Optional[Trade]:
         """
@@ -213,7 +355,7 @@ class TradeHistoryImporter:
         Returns:
             Trade object or None
         """
-        if category not in ['CSP_OPEN', 'CSP_CLOSE', 'CC_OPEN', 'CC_CLOSE']:
+        if category not in _OPTION_TRADE_CATEGORIES:
             return None
         
         # Parse the option symbol
@@ -259,66 +401,127 @@ class TradeHistoryImporter:
             tastytrade_order_id=str(txn.get('id', ''))
         )
     
-    def match_opens_with_closes(self, trades: List[Trade]) -> List[Trade]:
+    def build_trades_frame(self, transactions: List[Dict], categories: List[str],
+                           account_id: str) -> pd.DataFrame:
+        """
+        Build the trades of a transaction list as one DataFrame (one column per Trade field)
+        
+        Column-wise equivalent of calling build_trade_from_transaction on every
+        transaction: symbol parsing and premium math run once per column.
+        
+        Args:
+            transactions: Transaction dicts from API
+            categories: categorize_transaction result per transaction
+            account_id: Account ID
+        
+        Returns:
+            Trades frame in transaction order
+        """
+        # Keep only option trade rows (object dtype keeps ids/values exactly as sent)
+        txns = pd.DataFrame(transactions, dtype=object)
+        txns['category'] = categories
+        txns = txns[txns['category'].isin(_OPTION_TRADE_CATEGORIES)]
+        if txns.empty:
+            return pd.DataFrame(columns=_TRADE_COLUMNS)
+        
+        # Parse the option symbols, falling back to the transaction fields directly
+        parsed = _txn_column(txns, 'symbol', '').astype(str).str.strip().str.extract(f'^{_OCC_SYMBOL_RE.pattern}$')
+        parsed_ok = parsed[0].notna()
+        underlying = parsed[0].where(parsed_ok, _txn_column(txns, 'underlying-symbol', ''))
+        expiration = ('20' + parsed[1] + '-' + parsed[2] + '-' + parsed[3]).where(parsed_ok, _txn_column(txns, 'expiration-date', ''))
+        strike = (parsed[5].astype(float) / 1000).where(parsed_ok, pd.to_numeric(_txn_column(txns, 'strike-price', 0)))
+        
+        # Get premium (absolute value, as credits are negative in API)
+        net_value = pd.to_numeric(_txn_column(txns, 'net-value', 0)).abs()
+        quantity = np.trunc(pd.to_numeric(_txn_column(txns, 'quantity', 1))).abs().astype(int)
+        premium_per_contract = (net_value / quantity).where(quantity > 0, net_value)
+        
+        # Get trade date
+        executed_at = _txn_column(txns, 'executed-at', '').astype(str)
+        trade_date = executed_at.str[:10].where(executed_at != '', datetime.now().strftime('%Y-%m-%d'))
+        
+        # Determine trade type and action
+        trade_type = np.where(txns['category'].str.startswith('CSP'), 'CSP', 'CC')
+        is_open = txns['category'].str.endswith('OPEN').to_numpy()
+        
+        # Generate unique trade IDs for transactions without one
+        order_id = _txn_column(txns, 'id', '').astype(str)
+        trade_id = order_id.to_numpy(copy=True)
+        missing_id = trade_id == ''
+        trade_id[missing_id] = _random_uuids(int(missing_id.sum()))
+        
+        return pd.DataFrame({
+            'trade_id': trade_id,
+            'account_id': account_id,
+            'symbol': underlying,
+            'trade_type': trade_type,
+            'action': np.where(is_open, 'STO', 'BTC'),
+            'strike': strike.astype(float),
+            'expiration': expiration,
+            'quantity': quantity,
+            'premium_per_contract': premium_per_contract.astype(float),
+            'total_premium': net_value.astype(float),
+            'trade_date': trade_date,
+            'status': np.where(is_open, 'OPEN', 'CLOSED'),
+            'close_date': None,
+            'close_price': np.nan,
+            'realized_pnl': np.nan,
+            'tastytrade_order_id': order_id
+        }, columns=_TRADE_COLUMNS)
+    
+    def match_opens_with_closes(self, trades: pd.DataFrame) -> pd.DataFrame:
         """
         Match STO trades with their corresponding BTC trades
         
         Args:
-            trades: List of all trades
+            trades: Trades frame (see build_trades_frame)
         
         Returns:
-            Updated list of trades with matched status
+            Frame of the STO trades (sorted by date) with matched closes applied
         """
-        # Separate opens and closes
-        opens = [t for t in trades if t.action == 'STO']
-        closes = [t for t in trades if t.action == 'BTC']
-        
-        # Sort by date
-        opens.sort(key=lambda t: t.trade_date)
-        closes.sort(key=lambda t: t.trade_date)
-        
-        # Match closes to opens (FIFO)
-        for close in closes:
-            for open_trade in opens:
-                if (open_trade.status == 'OPEN' and
-                    open_trade.symbol == close.symbol and
-                    open_trade.strike == close.strike and
-                    open_trade.expiration == close.expiration and
-                    open_trade.trade_type == close.trade_type):
-                    
-                    # Match found - update open trade
-                    open_trade.status = 'CLOSED'
-                    open_trade.close_date = close.trade_date
-                    open_trade.close_price = close.premium_per_contract
-                    open_trade.realized_pnl = open_trade.total_premium - close.total_premium
-                    break
+        # Separate opens and closes, sorted by date
+        opens = trades[trades['action'] == 'STO'].sort_values('trade_date', kind='stable')
+        closes = trades[trades['action'] == 'BTC'].sort_values('trade_date', kind='stable')
+        
+        # Match closes to opens (FIFO): the n-th close of a contract closes its n-th open
+        opens = opens.assign(fifo_rank=opens.groupby(_CONTRACT_KEY).cumcount())
+        closes = closes.assign(fifo_rank=closes.groupby(_CONTRACT_KEY).cumcount())
+        matched = opens.merge(
+            closes[_CONTRACT_KEY + ['fifo_rank', 'trade_date', 'premium_per_contract', 'total_premium']],
+            on=_CONTRACT_KEY + ['fifo_rank'], how='left', suffixes=('', '_close')
+        )
         
-        # Return only STO trades (closes are now merged into opens)
-        return opens
+        # Update matched open trades (closes are now merged into opens)
+        is_closed = matched['trade_date_close'].notna()
+        matched['status'] = matched['status'].mask(is_closed, 'CLOSED')
+        matched['close_date'] = matched['trade_date_close']
+        matched['close_price'] = matched['premium_per_contract_close']
+        matched['realized_pnl'] = matched['total_premium'] - matched['total_premium_close']
+        
+        return matched[_TRADE_COLUMNS]
     
-    def check_for_expirations(self, trades: List[Trade]) -> List[Trade]:
+    def check_for_expirations(self, trades: pd.DataFrame) -> pd.DataFrame:
         """
         Mark expired options that weren't closed
         
         Args:
-            trades: List of trades
+            trades: Trades frame
         
         Returns:
-            Updated list with expired trades marked
+            Updated frame with expired trades marked
         """
-        today = datetime.now().date()
+        # YYYY-MM-DD strings sort like the dates they name, so no parsing is needed
+        today = datetime.now().strftime('%Y-%m-%d')
+        expiration = trades['expiration'].astype(str)
+        expired = (trades['status'] == 'OPEN') & (expiration.str.len() == 10) & (expiration < today)
         
-        for trade in trades:
-            if trade.status == 'OPEN':
-                exp_date = datetime.strptime(trade.expiration, '%Y-%m-%d').date()
-                if exp_date < today:
-                    trade.status = 'EXPIRED'
-                    trade.realized_pnl = trade.total_premium  # Full premium kept
+        trades.loc[expired, 'status'] = 'EXPIRED'
+        trades.loc[expired, 'realized_pnl'] = trades.loc[expired, 'total_premium']  # Full premium kept
         
         return trades
     
     def process_assignments(self, transactions: List[Dict], trades: List[Trade], 
-                           account_id: str) -> Tuple[List[Trade], List[StockPosition]]:
+                           account_id: str, categories: Optional[List[str]] = None) -> Tuple[List[Trade], List[StockPosition]]:
         """
         Process assignment transactions and create stock positions
         
@@ -326,97 +529,111 @@ class TradeHistoryImporter:
             transactions: Raw transactions from API
             trades: Processed trades
             account_id: Account ID
+            categories: Precomputed categorize_transaction result per transaction (optional)
         
         Returns:
             Tuple of (updated trades, new stock positions)
         """
         positions = []
         
-        for txn in transactions:
-            category = self.categorize_transaction(txn)
-            
+        if categories is None:
+            categories = [self.categorize_transaction(txn) for txn in transactions]
+        
+        # At most one new position per assignment, with ids drawn in one batch
+        position_ids = iter(_random_uuids(categories.count('ASSIGNMENT')))
+        
+        # Open trades per (symbol, trade type), in list order
+        open_trades: Dict[Tuple[str, str], deque] = defaultdict(deque)
+        for trade in trades:
+            if trade.status == 'OPEN':
+                open_trades[(trade.symbol, trade.trade_type)].append(trade)
+        
+        for txn, category in zip(transactions, categories):
             if category == 'ASSIGNMENT':
                 # Find the corresponding CSP trade
                 underlying = txn.get('underlying-symbol', '')
                 
-                # Look for matching open CSP
-                for trade in trades:
-                    if (trade.trade_type == 'CSP' and 
-                        trade.symbol == underlying and
-                        trade.status == 'OPEN'):
-                        
-                        # Mark CSP as assigned
-                        trade.status = 'ASSIGNED'
-                        
-                        # Create stock position
-                        # Cost basis = Strike - Premium received per share
-                        premium_per_share = trade.premium_per_contract / 100
-                        cost_basis = trade.strike - premium_per_share
-                        quantity = trade.quantity * 100  # Options = 100 shares
-                        
-                        position = StockPosition(
-                            position_id=str(uuid.uuid4()),
-                            account_id=account_id,
-                            symbol=underlying,
-                            quantity=quantity,
-                            cost_basis_per_share=cost_basis,
-                            total_cost_basis=cost_basis * quantity,
-                            acquisition_date=txn.get('executed-at', '')[:10],
-                            acquisition_method='ASSIGNMENT',
-                            linked_csp_trade_id=trade.trade_id
-                        )
-                        positions.append(position)
-                        break
+                # Take the first matching open CSP
+                matching = open_trades.get((underlying, 'CSP'))
+                if matching:
+                    trade = matching.popleft()
+                    
+                    # Mark CSP as assigned
+                    trade.status = 'ASSIGNED'
+                    
+                    # Create stock position
+                    # Cost basis = Strike - Premium received per share
+                    premium_per_share = trade.premium_per_contract / 100
+                    cost_basis = trade.strike - premium_per_share
+                    quantity = trade.quantity * 100  # Options = 100 shares
+                    
+                    position = StockPosition(
+                        position_id=next(position_ids),
+                        account_id=account_id,
+                        symbol=underlying,
+                        quantity=quantity,
+                        cost_basis_per_share=cost_basis,
+                        total_cost_basis=cost_basis * quantity,
+                        acquisition_date=txn.get('executed-at', '')[:10],
+                        acquisition_method='ASSIGNMENT',
+                        linked_csp_trade_id=trade.trade_id
+                    )
+                    positions.append(position)
             
             elif category == 'EXERCISE':
                 # Find the corresponding CC trade and mark as called away
                 underlying = txn.get('underlying-symbol', '')
                 
-                for trade in trades:
-                    if (trade.trade_type == 'CC' and 
-                        trade.symbol == underlying and
-                        trade.status == 'OPEN'):
-                        
-                        trade.status = 'CALLED_AWAY'
-                        break
+                matching = open_trades.get((underlying, 'CC'))
+                if matching:
+                    matching.popleft().status = 'CALLED_AWAY'
         
         return trades, positions
     
-    def process_stock_purchases(self, transactions: List[Dict], account_id: str) -> List[StockPosition]:
+    def process_stock_purchases(self, transactions: List[Dict], account_id: str,
+                                categories: Optional[List[str]] = None) -> List[StockPosition]:
         """
         Process direct stock purchases (not from assignments)
         
         Args:
             transactions: Raw transactions from API
             account_id: Account ID
+            categories: Precomputed categorize_transaction result per transaction (optional)
         
         Returns:
             List of stock positions from purchases
         """
-        positions = []
-        
-        for txn in transactions:
-            category = self.categorize_transaction(txn)
-            
-            if category == 'STOCK_BUY':
-                symbol = txn.get('underlying-symbol', txn.get('symbol', ''))
-                quantity = abs(int(float(txn.get('quantity', 0))))
-                value = abs(float(txn.get('net-value', 0)))
-                cost_per_share = value / quantity if quantity > 0 else 0
-                
-                position = StockPosition(
-                    position_id=str(uuid.uuid4()),
-                    account_id=account_id,
-                    symbol=symbol,
-                    quantity=quantity,
-                    cost_basis_per_share=cost_per_share,
-                    total_cost_basis=value,
-                    acquisition_date=txn.get('executed-at', '')[:10],
-                    acquisition_method='PURCHASE'
-                )
-                positions.append(position)
-        
-        return positions
+        if categories is None:
+            categories = [self.categorize_transaction(txn) for txn in transactions]
+        
+        purchases = [txn for txn, category in zip(transactions, categories) if category == 'STOCK_BUY']
+        if not purchases:
+            return []
+        
+        # Type each purchase field once for the whole column
+        txns = pd.DataFrame(purchases, dtype=object)
+        symbol = _txn_column(txns, 'underlying-symbol', _txn_column(txns, 'symbol', ''))
+        quantity = np.trunc(pd.to_numeric(_txn_column(txns, 'quantity', 0))).abs().astype(int)
+        value = pd.to_numeric(_txn_column(txns, 'net-value', 0)).abs().astype(float)
+        cost_per_share = (value / quantity).where(quantity > 0, 0.0)
+        acquisition_date = _txn_column(txns, 'executed-at', '').astype(str).str[:10]
+        
+        return [
+            StockPosition(
+                position_id=position_id,
+                account_id=account_id,
+                symbol=pos_symbol,
+                quantity=pos_quantity,
+                cost_basis_per_share=pos_cost_per_share,
+                total_cost_basis=pos_value,
+                acquisition_date=pos_date,
+                acquisition_method='PURCHASE'
+            )
+            for position_id, pos_symbol, pos_quantity, pos_cost_per_share, pos_value, pos_date in zip(
+                _random_uuids(len(txns)), symbol.tolist(), quantity.tolist(), cost_per_share.tolist(),
+                value.tolist(), acquisition_date.tolist()
+            )
+        ]
     
     def import_history(self, account_id: str, start_date: str, end_date: str,
                       progress_callback=None) -> Dict:
@@ -447,19 +664,38 @@ class TradeHistoryImporter:
             if progress_callback:
                 progress_callback("Fetching transactions from Tastytrade...")
             
-            transactions = self.fetch_all_transactions(account_id, start_date, end_date, progress_callback)
-            stats['total_transactions'] = len(transactions)
+            # Categorize each page as it arrives, sorting the transactions later
+            # steps use into option trades, assignments/exercises and stock purchases
+            option_txns, option_categories = [], []
+            assignment_txns, assignment_categories = [], []
+            purchase_txns = []
+            
+            # Settled months are fetched window by window, so repeat imports hit the page cache
+            windows = _import_windows(start_date, end_date)
+            for range_start, range_end in windows:
+                for page in self.iter_transaction_pages(account_id, range_start, range_end):
+                    stats['total_transactions'] += len(page)
+                    if progress_callback:
+                        progress_callback(f"Fetched {stats['total_transactions']} transactions...")
+                    for txn in page:
+                        category = self.categorize_transaction(txn)
+                        if category in _OPTION_TRADE_CATEGORIES:
+                            option_txns.append(txn)
+                            option_categories.append(category)
+                        elif category in _ASSIGNMENT_CATEGORIES:
+                            assignment_txns.append(txn)
+                            assignment_categories.append(category)
+                        elif category == 'STOCK_BUY':
+                            purchase_txns.append(txn)
+            
+            # Drop cached pages of windows this import no longer uses (e.g. months of older imports)
+            self._prune_page_cache(account_id, windows)
             
             if progress_callback:
-                progress_callback(f"Processing {len(transactions)} transactions...")
+                progress_callback(f"Processing {stats['total_transactions']} transactions...")
             
             # Step 2: Build trade objects
-            trades = []
-            for txn in transactions:
-                category = self.categorize_transaction(txn)
-                trade = self.build_trade_from_transaction(txn, category, account_id)
-                if trade:
-                    trades.append(trade)
+            trades = self.build_trades_frame(option_txns, option_categories, account_id)
             
             # Step 3: Match opens with closes
             if progress_callback:
@@ -469,13 +705,18 @@ class TradeHistoryImporter:
             # Step 4: Check for expirations
             trades = self.check_for_expirations(trades)
             
+            # Trade records from here on (assignments update them one by one)
+            trades = _trades_from_frame(trades)
+            
             # Step 5: Process assignments
             if progress_callback:
                 progress_callback("Processing assignments and exercises...")
-            trades, assigned_positions = self.process_assignments(transactions, trades, account_id)
+            trades, assigned_positions = self.process_assignments(assignment_txns, trades, account_id,
+                                                                  assignment_categories)
             
             # Step 6: Process direct stock purchases
-            purchased_positions = self.process_stock_purchases(transactions, account_id)
+            purchased_positions = self.process_stock_purchases(purchase_txns, account_id,
+                                                               ['STOCK_BUY'] * len(purchase_txns))
             
             # Combine positions
             all_positions = assigned_positions + purchased_positions
@@ -487,24 +728,17 @@ class TradeHistoryImporter:
             if progress_callback:
                 progress_callback("Saving to database...")
             
-            # Clear existing data first
-            data_store.delete_all_trades()
-            data_store.delete_all_positions()
-            data_store.delete_all_summaries()
-            
-            # Save new data
-            data_store.save_trades(trades)
-            data_store.save_positions(consolidated_positions)
-            
-            # Recalculate summaries
-            data_store.recalculate_summaries()
+            # Replace existing data and recalculate summaries (one write per file)
+            data_store.bulk_replace(trades, consolidated_positions)
             
             # Update stats
-            stats['csp_trades'] = len([t for t in trades if t.trade_type == 'CSP'])
-            stats['cc_trades'] = len([t for t in trades if t.trade_type == 'CC'])
+            type_counts = Counter(t.trade_type for t in trades)
+            status_counts = Counter(t.status for t in trades)
+            stats['csp_trades'] = type_counts['CSP']
+            stats['cc_trades'] = type_counts['CC']
             stats['stock_positions'] = len(consolidated_positions)
-            stats['assignments'] = len([t for t in trades if t.status == 'ASSIGNED'])
-            stats['expirations'] = len([t for t in trades if t.status == 'EXPIRED'])
+            stats['assignments'] = status_counts['ASSIGNED']
+            stats['expirations'] = status_counts['EXPIRED']
             
             if progress_callback:
                 progress_callback("Import complete!")
@@ -527,27 +761,37 @@ class TradeHistoryImporter:
         Returns:
             Consolidated list
         """
-        by_symbol = {}
-        
-        for pos in positions:
-            key = (pos.account_id, pos.symbol)
-            if key not in by_symbol:
-                by_symbol[key] = pos
-            else:
-                existing = by_symbol[key]
+        if not positions:
+            return []
+        
+        # One groupby over (account, symbol), groups in order of first appearance
+        df = pd.DataFrame({
+            'account_id': [pos.account_id for pos in positions],
+            'symbol': [pos.symbol for pos in positions],
+            'quantity': [pos.quantity for pos in positions],
+            'total_cost_basis': [pos.total_cost_basis for pos in positions],
+            'acquisition_date': [pos.acquisition_date for pos in positions]
+        })
+        by_symbol = df.groupby(['account_id', 'symbol'], sort=False)
+        totals = by_symbol[['quantity', 'total_cost_basis']].sum()
+        
+        consolidated = []
+        for first, count, total_qty, total_cost, earliest_date in zip(
+            by_symbol.head(1).index, by_symbol.size(), totals['quantity'].tolist(),
+            totals['total_cost_basis'].tolist(), by_symbol['acquisition_date'].min()
+        ):
+            # The first position of each symbol carries the merged totals
+            existing = positions[first]
+            if count > 1:
                 # Calculate weighted average cost basis
-                total_qty = existing.quantity + pos.quantity
-                total_cost = existing.total_cost_basis + pos.total_cost_basis
-                avg_cost = total_cost / total_qty if total_qty > 0 else 0
-                
                 existing.quantity = total_qty
                 existing.total_cost_basis = total_cost
-                existing.cost_basis_per_share = avg_cost
+                existing.cost_basis_per_share = total_cost / total_qty if total_qty > 0 else 0
                 # Keep earliest acquisition date
-                if pos.acquisition_date < existing.acquisition_date:
-                    existing.acquisition_date = pos.acquisition_date
+                existing.acquisition_date = earliest_date
+            consolidated.append(existing)
         
-        return list(by_symbol.values())
+        return consolidated
 
 
 def calculate_premium_realization(trade: Trade, current_price: float) -> float: